@@ -0,0 +1,112 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from computeFieldPath import Planner, getPlanner, loadEnvironment
+from runConfig import parseConfig
+from constants import *
+
+# Planner and shared memory blocks attached to by each worker process
+WORKER_PLANNER = None
+WORKER_BLOCKS  = []
+
+def shareArray(a):
+    '''
+    Copies the array into a new block of shared memory. Returns the block
+    along with the (name, shape, dtype) description workers attach to it by.
+    '''
+    block = SharedMemory(create=True, size=max(a.nbytes, 1))
+    np.ndarray(a.shape, dtype=a.dtype, buffer=block.buf)[...] = a
+    return block, (block.name, a.shape, a.dtype.str)
+
+def attachArray(desc, blocks=WORKER_BLOCKS):
+    '''
+    Returns a read-only view of the shared array with the given description,
+    adding the block of shared memory it is in to blocks.
+    '''
+    name, shape, dtype = desc
+    block = SharedMemory(name=name)
+    blocks.append(block)
+    a = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    a.flags.writeable = False
+    return a
+
+def attachField(boundary, obstacles, cellsDesc, markedDesc, config):
+    '''
+    Worker initializer which builds a planner with the RunConfig config over
+    the shared field, so the grids are never copied or pickled per task.
+    '''
+    global WORKER_PLANNER
+    # Per step progress from many workers would only garble the console
+    sys.stdout = open(os.devnull, 'w')
+    WORKER_PLANNER = Planner(boundary, obstacles,
+                             cells=attachArray(cellsDesc),
+                             marked=attachArray(markedDesc), config=config)
+
+def planPair(pair):
+    '''
+    Plans the path for a single (start, goal) pair in a worker process and
+    returns it as a list of [x, y] points.
+    '''
+    start, goal = pair
+    pathXs, pathYs = WORKER_PLANNER.plan(tuple(start), tuple(goal))
+    return [[x, y] for (x, y) in zip(pathXs, pathYs)]
+
+def planBatch(planner, pairs, processes=None):
+    '''
+    Plans a path for every (start, goal) pair over the planner's field using
+    a pool of worker processes, and returns the paths in the order of pairs.
+    '''
+    cellsBlock, cellsDesc = shareArray(planner.cells)
+    markedBlock, markedDesc = shareArray(planner.marked)
+    try:
+        initArgs = (planner.roomBoundary, planner.roomObstacles,
+                    cellsDesc, markedDesc, planner.config)
+        pool = Pool(processes, initializer=attachField, initargs=initArgs)
+        try:
+            chunkSize = max(1, len(pairs) // (4 * (processes or os.cpu_count())))
+            paths = pool.map(planPair, pairs, chunksize=chunkSize)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        for block in (cellsBlock, markedBlock):
+            block.close()
+            block.unlink()
+    return paths
+
+if __name__ == '__main__':
+
+    # Settings of the run come from --config FILE and --NAME=VALUE flags
+    CONFIG, ARGS = parseConfig(sys.argv[1:])
+    if len(ARGS) < 1:
+        print('Usage: python batchPlan.py PAIRS_FILE [OUTPUT_FILE] ' +
+              '[--config FILE] [--NAME=VALUE ...]')
+        exit(1)
+
+    startTime = time.time() # Start the timer
+
+    # Every pair is a [start, goal] list like the one in LOCATION_OUTPUT
+    with open(ARGS[0], 'r') as f:
+        PAIRS = json.load(f)
+    ROOM_BOUNDARY, ROOM_OBSTACLES, _, _ = loadEnvironment()
+    print('\nRead in environment data and ' + str(len(PAIRS)) + ' pairs...')
+
+    PLANNER = getPlanner(ROOM_BOUNDARY, ROOM_OBSTACLES, config=CONFIG)
+    PATHS = planBatch(PLANNER, PAIRS)
+
+    output = ARGS[1] if len(ARGS) > 1 else BATCH_PATHS_OUTPUT
+    with open(output, 'w') as wr:
+        json.dump(PATHS, wr)
+    print('Saved ' + str(len(PATHS)) + ' paths to ' + output + '...')
+
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
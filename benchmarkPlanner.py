@@ -0,0 +1,218 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import matplotlib
+from contextlib import redirect_stdout
+from computeFieldPath import Planner, getBoundingGrid, getLevelType, \
+                             loadEnvironment, plotFieldPath
+from generateScenarios import writeScenario
+from constants import *
+
+def timePhase(times, phase, f, *args, **kwargs):
+    '''
+    Calls f with the given arguments, records the fewest seconds it has
+    taken so far in times under phase and returns what it returned.
+    '''
+    startTime = time.perf_counter()
+    result = f(*args, **kwargs)
+    seconds = time.perf_counter() - startTime
+    times[phase] = min(seconds, times.get(phase, seconds))
+    return result
+
+def getRate(count, seconds):
+    '''
+    Returns count per second, or None if the phase took no measurable time.
+    '''
+    return count / seconds if seconds > 0 else None
+
+def benchmarkScenario(directory, seed, resolution, numObstacles, plot=True,
+                      repeats=BENCHMARK_REPEATS):
+    '''
+    Writes the scenario generated from seed with numObstacles obstacles to
+    directory, then times every phase of planning over it at the given
+    resolution: reading the JSON files, marking the unreachable cells,
+    seeding the edges, propagating the wavefront, following the paths of
+    every pair in both planning modes and plotting. Each phase keeps its
+    best time over repeats runs. Returns the timings and rates as a record
+    for the results file.
+    '''
+    writeScenario((directory, seed, BENCHMARK_PAIRS, numObstacles))
+
+    times = {}
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for repeat in range(repeats):
+            boundary, obstacles, start, goal = timePhase(times, 'load',
+                                                         loadEnvironment,
+                                                         directory)
+            with open(os.path.join(directory, SCENARIO_PAIRS_OUTPUT)) as f:
+                pairs = [(tuple(s), tuple(g)) for (s, g) in json.load(f)]
+
+            # Hand the planner empty grids so each phase of the field can be
+            # timed on its own
+            origin, shape = getBoundingGrid(boundary, resolution)
+            planner = Planner(boundary, obstacles, resolution=resolution,
+                              cells=np.zeros(shape, dtype=getLevelType(shape)),
+                              marked=np.full(shape, FREE_SPACE, dtype=np.uint8))
+            numMarked = timePhase(times, 'mark', planner.markUnreachablePoints)
+            seeds = timePhase(times, 'seed', planner.seedField)
+            timePhase(times, 'propagate', planner.propagate, seeds,
+                      1.0 * planner.cells.size - numMarked)
+
+            paths = timePhase(times, 'plan', lambda: [planner.plan(s, g)
+                                                      for (s, g) in pairs])
+            descents = timePhase(times, 'descent',
+                                 lambda: [planner.plan(s, g, DESCENT_MODE)
+                                          for (s, g) in pairs])
+
+            if plot:
+                import matplotlib.pyplot as plt
+                pathXs, pathYs = paths[0]
+                output = os.path.join(directory, 'wavefront_potential.png')
+                timePhase(times, 'plot', plotFieldPath, planner, start, goal,
+                          pathXs, pathYs, output=output)
+                plt.close('all')
+
+    reachable = int(np.count_nonzero(planner.cells))
+    steps = sum(len(pathXs) for (pathXs, pathYs) in paths)
+    descentSteps = sum(len(pathXs) for (pathXs, pathYs) in descents)
+    return {
+        'seed': seed,
+        'resolution': resolution,
+        'requestedObstacles': numObstacles,
+        'obstacles': len(obstacles),
+        'cells': int(planner.cells.size),
+        'reachable': reachable,
+        'seeds': len(seeds),
+        'steps': steps,
+        'descentSteps': descentSteps,
+        'times': times,
+        'cellsPerSecond': {
+            'mark': getRate(planner.cells.size, times['mark']),
+            'seed': getRate(len(seeds), times['seed']),
+            'propagate': getRate(reachable, times['propagate'])
+        },
+        'stepsPerSecond': {
+            'plan': getRate(steps, times['plan']),
+            'descent': getRate(descentSteps, times['descent'])
+        }
+    }
+
+def runBenchmarks(seeds=BENCHMARK_SEEDS, resolutions=BENCHMARK_RESOLUTIONS,
+                  obstacleCounts=BENCHMARK_OBSTACLES, plot=True,
+                  repeats=BENCHMARK_REPEATS):
+    '''
+    Benchmarks every seeded scenario at every resolution with every number
+    of obstacles and returns the results, including the versions of the
+    software they were measured with.
+    '''
+    directory = tempfile.mkdtemp(prefix='benchmark')
+    records = []
+    try:
+        for resolution in resolutions:
+            for numObstacles in obstacleCounts:
+                for seed in seeds:
+                    record = benchmarkScenario(directory, seed, resolution,
+                                               numObstacles, plot, repeats)
+                    records.append(record)
+                    printRecord(record)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'records': records
+    }
+
+def printRecord(record):
+    '''
+    Prints the timings and rates of a single benchmark record.
+    '''
+    cellRates = record['cellsPerSecond']
+    stepRates = record['stepsPerSecond']
+    print('D=' + str(record['resolution']) + ', ' +
+          str(record['obstacles']) + ' obstacles, seed ' +
+          str(record['seed']) + ': ' + str(record['cells']) + ' cells')
+    for phase, seconds in record['times'].items():
+        line = '    ' + phase.ljust(10) + str(round(seconds, 4)).rjust(10) + ' s'
+        rate = cellRates.get(phase)
+        if rate is not None:
+            line += str(int(rate)).rjust(14) + ' cells/s'
+        rate = stepRates.get(phase)
+        if rate is not None:
+            line += str(int(rate)).rjust(14) + ' steps/s'
+        print(line)
+
+def compareResults(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    '''
+    Returns a (record, phase, ratio) entry for every phase that took more
+    than tolerance times as long as it did for the same scenario in the
+    baseline results. Phases faster than BENCHMARK_MIN_SECONDS in both are
+    too short to time reliably and never count.
+    '''
+    def getKey(record):
+        return (record['seed'], record['resolution'],
+                record['requestedObstacles'])
+    baseRecords = dict((getKey(r), r) for r in baseline['records'])
+
+    regressions = []
+    for record in results['records']:
+        base = baseRecords.get(getKey(record))
+        if base is None:
+            continue
+        for phase, seconds in record['times'].items():
+            baseSeconds = base['times'].get(phase)
+            if not baseSeconds or \
+               max(seconds, baseSeconds) < BENCHMARK_MIN_SECONDS:
+                continue
+            if seconds / baseSeconds > tolerance:
+                regressions.append((record, phase, seconds / baseSeconds))
+    return regressions
+
+if __name__ == '__main__':
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) > 2:
+        print('Usage: python benchmarkPlanner.py [OUTPUT_FILE ' +
+              '[BASELINE_FILE]] [--no-plot]')
+        exit(1)
+
+    startTime = time.time() # Start the timer
+
+    # Plots are only saved, never shown
+    matplotlib.use('Agg')
+    RESULTS = runBenchmarks(plot='--no-plot' not in sys.argv[1:])
+
+    output = args[0] if len(args) > 0 else BENCHMARK_OUTPUT
+    with open(output, 'w') as wr:
+        json.dump(RESULTS, wr, indent=2)
+    print('\nSaved ' + str(len(RESULTS['records'])) + ' benchmark records to ' +
+          output + '...')
+
+    REGRESSIONS = []
+    if len(args) > 1:
+        with open(args[1], 'r') as f:
+            REGRESSIONS = compareResults(RESULTS, json.load(f))
+        for record, phase, ratio in REGRESSIONS:
+            print('[REGRESSION]: ' + phase + ' took ' + str(round(ratio, 2)) +
+                  'x the baseline for D=' + str(record['resolution']) + ', ' +
+                  str(record['requestedObstacles']) + ' obstacles, seed ' +
+                  str(record['seed']))
+        print('Compared against baseline in ' + args[1] + ', ' +
+              str(len(REGRESSIONS)) + ' regressions...')
+
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
+
+    if REGRESSIONS:
+        exit(1)
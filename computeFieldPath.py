@@ -3,285 +3,1344 @@
 # March 2017
 
 import json
+import math
+import os
+import shutil
 import sys
+import tempfile
+import weakref
 import numpy as np
 import matplotlib.path as path
-import matplotlib.pyplot as plt
-import seaborn as sns
 import time
+import heapq
+from collections import deque
 from getEnvironment import euclideanDistance
+from fieldCache import getFieldKey, loadField, saveField
+from plannerMetrics import PlannerMetrics
+from plannerProgress import getProgressReporter
+from obstacleIndex import ObstacleIndex, getBox
+from runConfig import getConfig, parseConfig
 from constants import *
 
-startTime = time.time() # Start the timer
+# Row and column offsets of the 8 cells around a cell
+NEIGHBORS = [(-1, 0), (1, 0), (0, -1), (0, 1),
+             (-1, -1), (1, -1), (-1, 1), (1, 1)]
 
-# Load in data from custom user specification
-with open (ROOM_BOUNDARY_OUTPUT, 'r') as f:
-    ROOM_BOUNDARY = json.load(f)
-with open(ROOM_OBSTACLES_OUTPUT, 'r') as f: 
-    ROOM_OBSTACLES = json.load(f)
-with open(LOCATION_OUTPUT, 'r') as f: 
-    (START_X, START_Y), (GOAL_X, GOAL_Y) = json.load(f)
-print('\nRead in environment data...')
+def getBoundingGrid(boundary, resolution, config=None):
+    '''
+    Returns the origin and (rows, cols) shape of the smallest grid lined up
+    with the cells of the configuration's window that covers the boundary
+    with its grid margin of cells to spare on every side.
+    '''
+    config = getConfig(config)
+    margin = config.gridMargin
+    xs, ys = [x for (x, y) in boundary], [y for (x, y) in boundary]
+    corner = -config.windowSize / 2.0
+    left = int(math.floor((min(xs) - corner) / resolution)) - margin
+    right = int(math.floor((max(xs) - corner) / resolution)) + margin + 1
+    bottom = int(math.floor((min(ys) - corner) / resolution)) - margin
+    top = int(math.floor((max(ys) - corner) / resolution)) + margin + 1
+    origin = (corner + left * resolution, corner + bottom * resolution)
+    return origin, (top - bottom, right - left)
+
+def getLevelType(shape, engine=FIELD_ENGINE):
+    '''
+    Returns the type of the levels of a grid with the given shape computed
+    by engine. Octile levels are fractional, while other levels never
+    exceed the side of the grid, so they get the smallest unsigned type that
+    can hold them.
+    '''
+    if engine == OCTILE_ENGINE:
+        return np.float32
+    if max(shape) <= np.iinfo(np.uint16).max:
+        return np.uint16
+    return np.uint32
+
+class PathIndex(object):
+    '''
+    Points of a path visited so far, kept in a hash set for revisit checks and
+    bucketed into square buckets of bucket cells a side for the
+    originality score. Distances to points in the buckets around the current
+    location are summed exactly. Farther points are summarized by a pyramid
+    of point counts and coordinate sums, whose level l merges 2**l by 2**l
+    buckets: every summary at least one of its own sides away from the
+    current location stands in for its points by its count times the
+    distance to its centroid. Only a ring of summaries at each level is
+    looked at, so each step costs the logarithm of the number of buckets
+    however long the path is.
+    '''
+
+    def __init__(self, shape, origin, resolution, bucket=ORIGINALITY_BUCKET):
+        self.visited = set()
+        self.origin = origin
+        self.size = bucket * resolution
+        self.numBuckets = (-(-shape[0] // bucket), -(-shape[1] // bucket))
+        self.points = {}
+
+        # Point count and coordinate sums of each occupied summary, by its row
+        # and column, at every level below the one whose summaries are all
+        # around each other
+        numLevels = max(max(self.numBuckets) - 1, 1).bit_length() - 1
+        self.levels = [{} for level in range(numLevels)]
+
+        # Bucket the far summaries were last gathered around, along with
+        # their counts and centroids, which only change once a point lands
+        # in another bucket
+        self.farBucket = None
+        self.far = None
+
+    def __len__(self):
+        return len(self.visited)
+
+    def __contains__(self, p):
+        return p in self.visited
+
+    def getBucket(self, p):
+        '''
+        Returns the row and column of the bucket containing point p.
+        '''
+        x, y = p
+        numRows, numCols = self.numBuckets
+        row = numRows - int((y - self.origin[1]) / self.size) - 1
+        col = int((x - self.origin[0]) / self.size)
+        return min(max(row, 0), numRows - 1), min(max(col, 0), numCols - 1)
+
+    def add(self, p):
+        '''
+        Adds point p to the path.
+        '''
+        self.visited.add(p)
+        row, col = bucket = self.getBucket(p)
+        self.points.setdefault(bucket, []).append(p)
+        if bucket != self.farBucket:
+            self.farBucket = None
+        for (level, summaries) in enumerate(self.levels):
+            summary = summaries.get((row >> level, col >> level))
+            if summary is None:
+                summary = summaries[row >> level, col >> level] = [0, 0.0, 0.0]
+            summary[0] += 1
+            summary[1] += p[0]
+            summary[2] += p[1]
+
+    def sumDistances(self, center, ps):
+        '''
+        Returns the sum of the distances from each of the points ps, which
+        must all lie within a cell of center, to every point in the path.
+        '''
+        ps = np.array(ps, dtype=float).reshape(-1, 2)
+        sums = np.zeros(len(ps))
+        if not self.visited:
+            return sums
+
+        # Sum the distances to the points in the buckets around center exactly
+        row, col = self.getBucket(center)
+        near = [p for r in range(row - 1, row + 2)
+                  for c in range(col - 1, col + 2)
+                  for p in self.points.get((r, c), ())]
+        if near:
+            near = np.array(near)
+            sums += np.hypot(ps[:, 0, None] - near[:, 0],
+                             ps[:, 1, None] - near[:, 1]).sum(axis=1)
+
+        # Every other point is in exactly one summary that is not around the
+        # summary of center at its level but whose parent is around center's
+        # parent, so take those from each level
+        if self.farBucket != (row, col):
+            far = []
+            for (level, summaries) in enumerate(self.levels):
+                r, c = row >> level, col >> level
+                rows = range(2 * ((r >> 1) - 1), 2 * ((r >> 1) + 2))
+                cols = range(2 * ((c >> 1) - 1), 2 * ((c >> 1) + 2))
+                far.extend(summaries[rr, cc] for rr in rows for cc in cols
+                           if (abs(rr - r) > 1 or abs(cc - c) > 1) and
+                              (rr, cc) in summaries)
+            far = np.array(far, dtype=float).reshape(-1, 3).T
+            self.farBucket = (row, col)
+            self.far = far[0], far[1] / far[0], far[2] / far[0]
+
+        counts, xs, ys = self.far
+        if len(counts):
+            sums += (np.hypot(ps[:, 0, None] - xs, ps[:, 1, None] - ys) *
+                     counts).sum(axis=1)
+        return sums
+
+class Planner(object):
+    '''
+    Wave front potential field over a polygonal room with polygonal
+    obstacles. The grid and its potential are computed once when the planner
+    is built, after which plan() can be called for any number of start and
+    goal locations in the room.
+    '''
+
+    def __init__(self, boundary, obstacles, cells=None, marked=None,
+                 storage=None, resolution=None, origin=None, shape=None,
+                 mask=None, metrics=None, progress=None, engine=None,
+                 config=None):
+        '''
+        Builds the potential field for the room whose boundary and obstacles
+        are given as lists of vertices. If the cells and marked grids of an
+        already computed field are given, they are used as they are instead.
+        If storage names a directory, the grids are memory-mapped from files
+        in it and the field is computed in bands of rows, so grids larger
+        than memory can be planned over.
+
+        The grid has cells resolution units a side and covers the bounding
+        box of the boundary by default. Otherwise it has the given (rows,
+        cols) shape and its bottom left corner at origin. Cells where the
+        boolean grid mask is False are treated as if they were outside the
+        boundary.
+
+        The durations of computing the field and planning paths are recorded
+        in metrics, a new PlannerMetrics by default. Their progress is passed
+        to the ProgressReporter progress, which prints to the console only
+        when it is a terminal by default.
+
+        The levels are propagated by the given engine: BFS_ENGINE visits the
+        cells one at a time, CHAMFER_ENGINE computes the same levels a row
+        at a time and OCTILE_ENGINE computes smoother fractional levels
+        which count diagonal steps as sqrt(2), the octile distance.
+
+        Everything else about the run comes from the RunConfig config, the
+        default one if it is None. The storage, resolution and engine given
+        override the configuration's own.
+        '''
+        config = getConfig(config)
+        overrides = (('storage', storage), ('resolution', resolution),
+                     ('engine', engine))
+        config = config.replace(**dict((name, value)
+                                       for (name, value) in overrides
+                                       if value is not None))
+        self.config = config
+        storage, resolution = config.storage, config.resolution
+        self.engine = engine = config.engine
+        self.metrics = PlannerMetrics() if metrics is None else metrics
+        if progress is None:
+            progress = getProgressReporter()
+        self.progress = progress
+        self.storage = storage
+        self.gridDirectory = self.removeGrids = None
+        self.resolution = resolution
+        self.mask = mask
+        self.roomBoundary = boundary
+        self.roomObstacles = list(obstacles)
+
+        # Organize the boundary into a polygon data structure
+        self.boundary = path.Path(boundary)
+        self.obstacleIndex = ObstacleIndex(obstacles)
+        self.obstacles = self.obstacleIndex.paths
+
+        # Locations of the cells in each column and, from the top, each row
+        if origin is None:
+            origin, shape = getBoundingGrid(boundary, resolution, config)
+        self.origin, self.shape = origin, shape
+        self.metrics.set(cells=shape[0] * shape[1])
+        self.xSide = origin[0] + np.arange(shape[1]) * resolution
+        self.ySide = (origin[1] + np.arange(shape[0]) * resolution)[::-1]
+
+        # Number of polygons whose edges seed each cell, only needed once the
+        # obstacles change
+        self.seedCount = None
+        if cells is not None:
+            self.cells, self.marked = cells, marked
+            return
+
+        # Create a matrix to store the potential
+        self.cells = self.allocateGrid('cells',
+                                       getLevelType(self.shape, engine), 0)
+        self.marked = self.allocateGrid('marked', np.uint8, FREE_SPACE)
+        self.computeField()
+
+    def allocateGrid(self, name, dtype, fill):
+        '''
+        Returns a new grid of the given type filled with fill. The grid is
+        held in memory, or memory-mapped from name.npy in a directory of its
+        own the planner makes in the storage directory, so planners sharing
+        the storage never map each other's files. The directory is removed
+        once the planner is garbage collected, or when removeGrids() is
+        called.
+        '''
+        if self.storage is None:
+            return np.full(self.shape, fill, dtype=dtype)
+
+        if self.gridDirectory is None:
+            if not os.path.isdir(self.storage):
+                os.makedirs(self.storage)
+            self.gridDirectory = tempfile.mkdtemp(prefix='grids-',
+                                                  dir=self.storage)
+            self.removeGrids = weakref.finalize(self, shutil.rmtree,
+                                                self.gridDirectory, True)
+
+        # Grids allocated again under the same name get a new file, leaving
+        # the old one intact for anything still mapping it
+        filename = os.path.join(self.gridDirectory, name + '.npy')
+        if os.path.exists(filename):
+            os.remove(filename)
+        grid = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype,
+                                         shape=self.shape)
+        if fill != 0:
+            bandRows = self.config.bandRows
+            for start in range(0, self.shape[0], bandRows):
+                grid[start:start + bandRows] = fill
+        return grid
+
+    def getIndexForPoint(self, p):
+        '''
+        Returns index in the grid associated with a given point, p.
+        '''
+        x, y = p
+        row = self.shape[0] - int(math.floor((y - self.origin[1]) /
+                                             self.resolution)) - 1
+        col = int(math.floor((x - self.origin[0]) / self.resolution))
+        return row, col
+
+    def enqueue(self, row, col, level):
+        '''
+        Adds the cell at (row, col) to the queue with the given level if it is
+        inside the grid, in free space and has not been queued before.
+        '''
+        if row < 0 or row >= self.shape[0] or col < 0 or col >= self.shape[1]:
+            return
+        if self.markedView[row, col] == FREE_SPACE and \
+           not self.enqueuedView[row, col]:
+            self.enqueuedView[row, col] = 1
+            self.queue.append((row, col, level))
+
+    def getEdgeCells(self, polygon):
+        '''
+        Returns the rows and columns of every cell that an edge of the
+        polygon, given as a list of vertices, passes through. Each edge is cut
+        wherever it crosses a line between two rows or columns of cells, so
+        every piece lies in exactly one cell whatever the slope of the edge.
+        '''
+        ox, oy = self.origin
+        us = (np.array([x for (x, y) in polygon], dtype=float) - ox) / \
+             self.resolution
+        vs = (np.array([y for (x, y) in polygon], dtype=float) - oy) / \
+             self.resolution
+
+        pieces = []
+        for (u1, v1, u2, v2) in zip(us[:-1], vs[:-1], us[1:], vs[1:]):
+            cuts = [np.array([0.0, 1.0])]
+            for (a, b) in ((u1, u2), (v1, v2)):
+                if a != b:
+                    lines = np.arange(math.floor(min(a, b)) + 1,
+                                      math.ceil(max(a, b)))
+                    cuts.append((lines - a) / (b - a))
+            cuts = np.unique(np.concatenate(cuts))
+
+            # The middle of each piece falls in the cell the piece crosses
+            ts = np.concatenate([(cuts[:-1] + cuts[1:]) / 2, cuts[[0, -1]]])
+            pieces.append((u1 + ts * (u2 - u1), v1 + ts * (v2 - v1)))
+
+        u = np.concatenate([u for (u, v) in pieces])
+        v = np.concatenate([v for (u, v) in pieces])
+        rows = self.shape[0] - np.floor(v).astype(np.int64) - 1
+        cols = np.floor(u).astype(np.int64)
+        return rows, cols
+
+    def getSeedsForPolygon(self, polygon):
+        '''
+        Returns the rows and columns of the cells along the edges of the
+        polygon, given as a list of vertices, that the wavefront starts from:
+        every cell in the grid that an edge passes through or that touches
+        one, each listed once.
+        '''
+        rows, cols = self.getEdgeCells(polygon)
+
+        # Take the edge cells and the cells around them that are in the grid,
+        # keeping each once by its position in the flattened grid, so memory
+        # only grows with the length of the edges
+        seedRows = np.concatenate([rows + dRow for (dRow, dCol)
+                                   in [(0, 0)] + NEIGHBORS])
+        seedCols = np.concatenate([cols + dCol for (dRow, dCol)
+                                   in [(0, 0)] + NEIGHBORS])
+        inside = (seedRows >= 0) & (seedRows < self.shape[0]) & \
+                 (seedCols >= 0) & (seedCols < self.shape[1])
+        flat = np.unique(seedRows[inside].astype(np.int64) * self.shape[1] +
+                         seedCols[inside])
+        return flat // self.shape[1], flat % self.shape[1]
+
+    def countSeeds(self):
+        '''
+        Returns a grid holding the number of polygons whose edges seed each
+        cell.
+        '''
+        seedCount = self.allocateGrid('seeds', np.uint16, 0)
+        for polygon in [self.roomBoundary] + self.roomObstacles:
+            seedCount[self.getSeedsForPolygon(polygon)] += 1
+        return seedCount
+
+    def markUnreachablePoints(self):
+        '''
+        Classifies every cell in the grid by testing the meshgrid of cell
+        locations against the boundary and each obstacle, a band of rows at a
+        time, writing the result into the marked grid. Cells masked off are
+        never tested. Returns the number of cells that were marked as
+        BOUNDARY_SPACE or OBSTACLE_SPACE.
+        '''
+        numMarked, bandRows = 0, self.config.bandRows
+        for start in range(0, self.shape[0], bandRows):
+            rows = slice(start, min(start + bandRows, self.shape[0]))
+
+            # Row 0 of the grid is the top of the window, so walk y in reverse
+            xs, ys = np.meshgrid(self.xSide, self.ySide[rows])
+
+            # If point is not within the boundary of the environment, or is
+            # masked off, leave it out of the grid like the outside
+            if self.mask is None:
+                inBoundary = self.boundary.contains_points(
+                    np.column_stack((xs.ravel(), ys.ravel())))
+                inBoundary = inBoundary.reshape(xs.shape)
+            else:
+                inBoundary = np.array(self.mask[rows], dtype=bool)
+                inBoundary[inBoundary] = self.boundary.contains_points(
+                    np.column_stack((xs[inBoundary], ys[inBoundary])))
+            marked = np.where(inBoundary, FREE_SPACE,
+                              BOUNDARY_SPACE).astype(np.uint8)
+
+            # If point is inside one of the obstacles within environment
+            # boundary, mark it. Only the obstacles near the band are tested,
+            # each against the cells of its own bounding box still in play
+            band = self.getRegionBox(rows, slice(0, self.shape[1]))
+            for i in self.obstacleIndex.query(band):
+                obsRows, obsCols = self.getRegionForPolygon(
+                    self.roomObstacles[i])
+                obsRows = slice(max(obsRows.start, rows.start) - rows.start,
+                                min(obsRows.stop, rows.stop) - rows.start)
+                if obsRows.start >= obsRows.stop:
+                    continue
+                block = (obsRows, obsCols)
+                tested = inBoundary[block]
+                if not tested.any():
+                    continue
+                inObstacle = self.obstacles[i].contains_points(
+                    np.column_stack((xs[block][tested], ys[block][tested])))
+                blockMarked = marked[block]
+                blockMarked[tested] = np.where(inObstacle, OBSTACLE_SPACE,
+                                               blockMarked[tested])
+
+            self.marked[rows] = marked
+            numMarked += int(np.count_nonzero(marked != FREE_SPACE))
+
+        return numMarked
+
+    def computeField(self):
+        '''
+        Marks the unreachable cells of the grid, seeds the wavefront along the
+        boundary and obstacle edges and propagates it until every reachable
+        cell has a potential level.
+        '''
+        # Mark all the points that aren't in the boundary
+        with self.metrics.phase('mark'):
+            numMarked = self.markUnreachablePoints()
+        print('Marked all unreachable points in the environment...')
+
+        with self.metrics.phase('seed'):
+            seeds = self.seedField()
+        self.metrics.set(seeds=len(seeds))
+
+        reachableToMark = 1.0 * self.cells.size - numMarked
+        with self.metrics.phase('propagate'):
+            if self.engine != BFS_ENGINE:
+                self.propagateTransform(seeds)
+            elif self.storage is None:
+                self.propagate(seeds, reachableToMark)
+            else:
+                self.propagateInBands(seeds)
+
+        # Count the cells the wavefront reached a band at a time, so grids
+        # larger than memory are never loaded whole
+        bandRows = self.config.bandRows
+        reachable = sum(int(np.count_nonzero(self.cells[r:r + bandRows]))
+                        for r in range(0, self.shape[0], bandRows))
+        self.metrics.set(reachable=reachable)
+
+    def seedField(self):
+        '''
+        Returns the set of free cells along the edges of the boundary and the
+        obstacles the wavefront starts from, counting the polygons that seed
+        each cell so obstacles can be changed later.
+        '''
+        # Identify points on the interior of the boundary
+        seeds = set()
+        self.seedCount = self.allocateGrid('seeds', np.uint16, 0)
+        seedRows, seedCols = self.getSeedsForPolygon(self.roomBoundary)
+        self.seedCount[seedRows, seedCols] += 1
+        seeds.update(zip(seedRows.tolist(), seedCols.tolist()))
+        print('Computed points on interior of environment boundary...')
+
+        # Identify points on exterior of each obstacle and interior of boundary
+        for obs in self.roomObstacles:
+            seedRows, seedCols = self.getSeedsForPolygon(obs)
+            self.seedCount[seedRows, seedCols] += 1
+            seeds.update(zip(seedRows.tolist(), seedCols.tolist()))
+        print('Computed points on immediate exterior of each obstacle...')
+
+        return seeds
+
+    def propagate(self, seeds, reachableToMark):
+        '''
+        Propagates the wavefront outwards from the seed cells one cell at a
+        time, giving every reachable cell its level.
+        '''
+        # Need to fill up queue with (row, col, level) entries of cells to
+        # mark, and flag every cell once it has been queued so it is never
+        # queued twice
+        self.queue = deque()
+        self.enqueued = np.zeros(self.shape, dtype=np.uint8)
+
+        # Memoryviews over the grids give the propagation loop plain int
+        # indexing into the arrays without boxing every element through numpy
+        self.cellsView = memoryview(self.cells)
+        self.markedView = memoryview(self.marked)
+        self.enqueuedView = memoryview(self.enqueued)
+
+        for (row, col) in seeds:
+            self.enqueue(row, col, 1)
+
+        # Continuously mark all the cells and set their potential levels until
+        # we've marked every cell
+        numMarked, peakQueue = 0, len(self.queue)
+        nextReport = self.progress.start('propagate', int(reachableToMark))
+        while len(self.queue) != 0:
+            # Get cell off the queue. Cells are only ever queued while they
+            # are in free space, and only once, so every cell popped still
+            # needs a level
+            row, col, l = self.queue.popleft()
+
+            # Add level to this cell's entry and mark it as visited
+            self.cellsView[row, col] = l
+            self.markedView[row, col] = VISITED_SPACE
+            numMarked += 1
+
+            # Add unmarked cells around the current cell to the queue
+            for dRow, dCol in NEIGHBORS:
+                self.enqueue(row + dRow, col + dCol, l + 1)
+            if len(self.queue) > peakQueue:
+                peakQueue = len(self.queue)
+
+            if numMarked >= nextReport:
+                nextReport = self.progress.update(numMarked,
+                                                  queued=len(self.queue))
+
+        self.progress.finish(numMarked, queued=0)
+        self.metrics.peak('peakQueue', peakQueue)
+
+    def propagateInBands(self, seeds):
+        '''
+        Propagates the wavefront through the grid one band of rows at a time,
+        so that only a single band is ever held in memory. Each band is
+        solved given the edge rows of the bands around it, and a band is
+        solved again whenever one of those rows changes, sweeping down and up
+        the grid until no level changes.
+        '''
+        bandRows = self.config.bandRows
+        numBands = -(-self.shape[0] // bandRows)
+        bandSeeds = [[] for b in range(numBands)]
+        for (row, col) in seeds:
+            bandSeeds[row // bandRows].append((row, col))
+
+        pending = [True] * numBands
+        sweep, bands, numSolved = 0, list(range(numBands)), 0
+        self.progress.start('bands')
+        while any(pending):
+            for b in bands:
+                if not pending[b]:
+                    continue
+                pending[b] = False
+                topChanged, bottomChanged = self.solveBand(b, bandSeeds[b])
+                if topChanged and b > 0:
+                    pending[b - 1] = True
+                if bottomChanged and b < numBands - 1:
+                    pending[b + 1] = True
+
+                # Bands are slow enough to offer every one to the reporter
+                numSolved += 1
+                self.progress.update(numSolved, sweep=sweep + 1,
+                                     band=b + 1, bands=numBands)
+
+            # Alternate the direction of every sweep
+            sweep, bands = sweep + 1, bands[::-1]
+
+        self.progress.finish(numSolved, sweep=sweep, bands=numBands)
+
+    def solveBand(self, band, seeds):
+        '''
+        Lowers the levels of the cells in the band as far as its seeds and
+        the rows just above and below it allow, in order of increasing level.
+        Returns whether the top and the bottom row of the band changed.
+        '''
+        rows, cols = self.shape
+        bandRows = self.config.bandRows
+        start, stop = band * bandRows, min((band + 1) * bandRows, rows)
+
+        # Copy the band into memory along with a row on either side
+        haloStart, haloStop = max(start - 1, 0), min(stop + 1, rows)
+        levels = np.array(self.cells[haloStart:haloStop])
+        marked = np.array(self.marked[haloStart:haloStop])
+        first, last = start - haloStart, stop - 1 - haloStart
+        top, bottom = levels[first].copy(), levels[last].copy()
+        levelsView, markedView = memoryview(levels), memoryview(marked)
+
+        def isOpen(r, c):
+            return markedView[r, c] != BOUNDARY_SPACE and \
+                   markedView[r, c] != OBSTACLE_SPACE
+
+        # Start from the seeds in the band and the levels around it
+        heap = [(1, row - haloStart, col) for (row, col) in seeds
+                if isOpen(row - haloStart, col)]
+        for r in set([0, len(levels) - 1]) - set([first, last]):
+            heap.extend((int(levels[r, c]), r, int(c))
+                        for c in np.flatnonzero(levels[r]))
+        heapq.heapify(heap)
+
+        peakQueue = len(heap)
+        while len(heap) != 0:
+            if len(heap) > peakQueue:
+                peakQueue = len(heap)
+            l, r, c = heapq.heappop(heap)
+            if first <= r <= last:
+                if 0 < levelsView[r, c] <= l:
+                    continue
+                levelsView[r, c] = l
+                markedView[r, c] = VISITED_SPACE
+
+            # Lower the levels of the cells in the band around this one
+            for dRow, dCol in NEIGHBORS:
+                nr, nc = r + dRow, c + dCol
+                if first <= nr <= last and 0 <= nc < cols and \
+                   isOpen(nr, nc) and \
+                   (levelsView[nr, nc] == 0 or levelsView[nr, nc] > l + 1):
+                    heapq.heappush(heap, (l + 1, nr, nc))
+
+        self.metrics.peak('peakQueue', peakQueue)
+        self.cells[start:stop] = levels[first:last + 1]
+        self.marked[start:stop] = marked[first:last + 1]
+        return (levels[first] != top).any(), (levels[last] != bottom).any()
+
+    def propagateTransform(self, seeds):
+        '''
+        Gives every reachable cell the level the wavefront would by a
+        distance transform over whole rows. Passes alternately down and up
+        the grid lower each row from the row before it and then along the
+        row itself in both directions, until a pass lowers nothing. Levels
+        are the fixed point of the same neighbor steps the wavefront takes,
+        so they match it exactly, or count diagonal steps as sqrt(2) for the
+        octile engine.
+        '''
+        rows, cols = self.shape
+        octile = self.engine == OCTILE_ENGINE
+        diagonal = math.sqrt(2) if octile else 1
+        dtype = np.float64 if octile else np.int64
+
+        # Levels of unreached cells, larger than any real level, and the
+        # offset keeping the segments of a row between blocked cells apart
+        unreached = 2 * rows * cols
+        offset = 4 * unreached
+        indices = np.arange(cols)
+
+        levels = self.allocateGrid('levels', dtype, unreached)
+        if seeds:
+            seedRows, seedCols = np.array(list(seeds)).T
+            marked = np.asarray(self.marked[seedRows, seedCols])
+            isOpen = (marked != BOUNDARY_SPACE) & (marked != OBSTACLE_SPACE)
+            levels[seedRows[isOpen], seedCols[isOpen]] = 1
+
+        def relaxRow(row, above):
+            # Lower the row from the row above it in the direction of the pass
+            marked = np.asarray(self.marked[row])
+            isOpen = (marked != BOUNDARY_SPACE) & (marked != OBSTACLE_SPACE)
+            new = np.array(levels[row])
+            if above is not None:
+                new = np.minimum(new, above + 1)
+                new[1:] = np.minimum(new[1:], above[:-1] + diagonal)
+                new[:-1] = np.minimum(new[:-1], above[1:] + diagonal)
+            new[~isOpen] = unreached
+
+            # Lower each cell from the ones to its left and right within the
+            # same segment, so blocked cells stop the levels spreading
+            segments = np.cumsum(~isOpen) * offset
+            left = np.minimum.accumulate(new - indices - segments)
+            left += indices + segments
+            right = np.minimum.accumulate((new + indices + segments)[::-1])
+            right = right[::-1] - indices - segments
+            new = np.minimum(new, np.minimum(left, right))
+            new[~isOpen] = unreached
+            return new
+
+        order, numPasses, lowered = list(range(rows)), 0, True
+        self.progress.start('transform')
+        while lowered:
+            lowered, above = False, None
+            for row in order:
+                new = relaxRow(row, above)
+                if (new < levels[row]).any():
+                    levels[row] = new
+                    lowered = True
+                above = new
 
-# Organize the boundary into a polygon data structure
-BOUNDARY  = path.Path(ROOM_BOUNDARY)
-OBSTACLES = [path.Path(obs) for obs in ROOM_OBSTACLES]
+            # Alternate the direction of every pass
+            order, numPasses = order[::-1], numPasses + 1
+            self.progress.update(numPasses)
+        self.progress.finish(numPasses)
 
-# Create a matrix to store the potential
-WINDOW_SIDE = np.arange(-WINDOW_SIZE / 2.0, WINDOW_SIZE / 2.0, D)
-CELLS = [[0 for x in WINDOW_SIDE] for y in WINDOW_SIDE]
-MARKED = [[FREE_SPACE for x in WINDOW_SIDE] for y in WINDOW_SIDE]
-TOTAL_CELLS = 1.0 * len(CELLS) * len(CELLS[0])
+        # Copy the levels of the reached cells into the field a row at a time
+        for row in range(rows):
+            reached = levels[row] < unreached
+            self.cells[row] = np.where(reached, levels[row], 0)
+            self.marked[row][reached] = VISITED_SPACE
 
-# Need to fill up queue with points to mark
-QUEUE = []
+    def getRegionForPolygon(self, polygon):
+        '''
+        Returns the first and last rows and columns, as slices, of the part of
+        the grid covering the bounding box of the polygon.
+        '''
+        minX, minY, maxX, maxY = getBox(polygon)
+        top, left = self.getIndexForPoint((minX, maxY))
+        bottom, right = self.getIndexForPoint((maxX, minY))
+        rows = slice(max(top - 1, 0), min(bottom + 2, self.shape[0]))
+        cols = slice(max(left - 1, 0), min(right + 2, self.shape[1]))
+        return rows, cols
 
-def getIndexForPoint(p):
+    def getRegionBox(self, rows, cols):
+        '''
+        Returns the (minX, minY, maxX, maxY) bounding box of the locations of
+        the cells in the given rows and columns of the grid.
+        '''
+        return (self.xSide[cols.start], self.ySide[rows.stop - 1],
+                self.xSide[cols.stop - 1], self.ySide[rows.start])
+
+    def rasterizeRegion(self, polygon):
+        '''
+        Classifies again the cells in the bounding box of the polygon against
+        the current obstacles, updating the marked grid. Returns the cells
+        that became blocked and the cells that became free, none if the
+        polygon lies outside the grid.
+        '''
+        rows, cols = self.getRegionForPolygon(polygon)
+        if rows.start >= rows.stop or cols.start >= cols.stop:
+            return [], []
+        xs, ys = np.meshgrid(self.xSide[cols], self.ySide[rows])
+        points = np.column_stack((xs.ravel(), ys.ravel()))
+        region = self.marked[rows, cols]
+
+        # Whether a cell is within the boundary never changes, so only the
+        # obstacles overlapping the region need to be tested
+        inBoundary = region != BOUNDARY_SPACE
+        inObstacle = np.zeros(region.shape, dtype=bool)
+        for i in self.obstacleIndex.query(self.getRegionBox(rows, cols)):
+            inObstacle |= self.obstacles[i].contains_points(points).reshape(
+                region.shape)
+
+        wasBlocked = ~inBoundary | (region == OBSTACLE_SPACE)
+        isBlocked = ~inBoundary | inObstacle
+        blocked = np.argwhere(isBlocked & ~wasBlocked)
+        freed = np.argwhere(wasBlocked & ~isBlocked)
+        region[isBlocked & ~wasBlocked] = OBSTACLE_SPACE
+        region[wasBlocked & ~isBlocked] = FREE_SPACE
+
+        return [(int(r) + rows.start, int(c) + cols.start) for (r, c) in blocked], \
+               [(int(r) + rows.start, int(c) + cols.start) for (r, c) in freed]
+
+    def updateObstacles(self, added=(), removed=()):
+        '''
+        Changes the obstacles of the room, adding each polygon in added and
+        removing the obstacles at the indices in removed, and repairs the
+        field without computing it again. Only the cells in the bounding
+        boxes of the changed obstacles are classified again, and only the
+        cells whose level changes are visited. Returns the number of cells
+        whose level was repaired.
+        '''
+        if self.seedCount is None:
+            self.seedCount = self.countSeeds()
+
+        # Work out the new obstacles and the seeds of every changed one before
+        # touching the planner, so a bad change leaves it as it was
+        removed = sorted(set(range(len(self.roomObstacles))[i]
+                             for i in removed), reverse=True)
+        changed = [self.roomObstacles[i] for i in removed]
+        kept = set(range(len(self.roomObstacles))) - set(removed)
+        obstacles = [self.roomObstacles[i] for i in sorted(kept)] + \
+                    list(added)
+        removedSeeds = [self.getSeedsForPolygon(obs) for obs in changed]
+        addedSeeds = [self.getSeedsForPolygon(obs) for obs in added]
+        obstacleIndex = ObstacleIndex(obstacles)
+
+        # Update the obstacles and the count of polygons seeding each cell
+        self.roomObstacles[:] = obstacles
+        self.obstacleIndex = obstacleIndex
+        self.obstacles = obstacleIndex.paths
+        seeds = set()
+        for (rows, cols) in removedSeeds:
+            self.seedCount[rows, cols] -= 1
+            seeds.update(zip(rows.tolist(), cols.tolist()))
+        for (rows, cols) in addedSeeds:
+            self.seedCount[rows, cols] += 1
+            seeds.update(zip(rows.tolist(), cols.tolist()))
+        changed.extend(added)
+
+        # Mark the cells covered or uncovered by the changed obstacles
+        blocked, freed = [], []
+        for obs in changed:
+            b, f = self.rasterizeRegion(obs)
+            blocked.extend(b)
+            freed.extend(f)
+
+        # Octile levels do not follow from a single neighbor one level
+        # lower, so they are computed again from every seed instead
+        if self.engine == OCTILE_ENGINE:
+            return self.recomputeLevels()
+        return self.repairLevels(blocked, freed, seeds)
+
+    def recomputeLevels(self):
+        '''
+        Computes the levels of every cell again from the seeds of the current
+        obstacles. Returns the number of cells whose level changed.
+        '''
+        # Set the old levels aside and clear the field a band at a time,
+        # collecting the seeds in each band
+        bandRows, seeds = self.config.bandRows, set()
+        previous = self.allocateGrid('previous', self.cells.dtype, 0)
+        for start in range(0, self.shape[0], bandRows):
+            rows = slice(start, start + bandRows)
+            previous[rows] = self.cells[rows]
+            self.cells[rows] = 0
+            marked = self.marked[rows]
+            marked[marked == VISITED_SPACE] = FREE_SPACE
+            seedRows, seedCols = np.nonzero(self.seedCount[rows])
+            seeds.update(zip(seedRows + start, seedCols))
+        self.propagateTransform(seeds)
+
+        numChanged = 0
+        for start in range(0, self.shape[0], bandRows):
+            rows = slice(start, start + bandRows)
+            numChanged += np.count_nonzero(previous[rows] != self.cells[rows])
+        return int(numChanged)
+
+    def repairLevels(self, blocked, freed, seeds):
+        '''
+        Repairs the levels of the field after the cells in blocked became
+        obstacles, the cells in freed became free and the cells in seeds were
+        seeded by more or fewer polygons. Cells that lost the neighbor their
+        level was derived from are first cleared, then levels are lowered
+        outwards from the changed cells in order, as in a dynamic wavefront.
+        Returns the number of cells whose level was repaired.
+        '''
+        rows, cols = self.shape
+        cells, marked = memoryview(self.cells), memoryview(self.marked)
+        seedCount = memoryview(self.seedCount)
+
+        def isOpen(r, c):
+            return 0 <= r < rows and 0 <= c < cols and \
+                   marked[r, c] != BOUNDARY_SPACE and \
+                   marked[r, c] != OBSTACLE_SPACE
+
+        def isSupported(r, c):
+            level = cells[r, c]
+            if level == 1:
+                return seedCount[r, c] > 0
+            return any(isOpen(r + dRow, c + dCol) and
+                       cells[r + dRow, c + dCol] == level - 1
+                       for dRow, dCol in NEIGHBORS)
+
+        # Clear the levels of the newly blocked cells and collect the cells
+        # that may have depended on them
+        raised = deque(seeds)
+        for (r, c) in blocked:
+            cells[r, c] = 0
+            raised.extend((r + dRow, c + dCol) for dRow, dCol in NEIGHBORS)
+
+        # Clear every cell whose level is no longer supported by a seed or a
+        # neighbor one level lower, following the cleared levels outwards
+        cleared = list(freed)
+        while len(raised) != 0:
+            r, c = raised.popleft()
+            if not isOpen(r, c) or cells[r, c] == 0 or isSupported(r, c):
+                continue
+            level = cells[r, c]
+            cells[r, c] = 0
+            marked[r, c] = FREE_SPACE
+            cleared.append((r, c))
+            for dRow, dCol in NEIGHBORS:
+                if isOpen(r + dRow, c + dCol) and \
+                   cells[r + dRow, c + dCol] == level + 1:
+                    raised.append((r + dRow, c + dCol))
+
+        # Queue the best level each cleared cell and seed can get from its
+        # surroundings
+        heap = []
+        for (r, c) in cleared + list(seeds):
+            if not isOpen(r, c):
+                continue
+            if seedCount[r, c] > 0:
+                heap.append((1, r, c))
+                continue
+            levels = [cells[r + dRow, c + dCol] for dRow, dCol in NEIGHBORS
+                      if isOpen(r + dRow, c + dCol) and
+                         cells[r + dRow, c + dCol] > 0]
+            if levels:
+                heap.append((min(levels) + 1, r, c))
+        heapq.heapify(heap)
+
+        # Lower levels outwards in order of increasing level
+        repaired = set(cleared)
+        while len(heap) != 0:
+            level, r, c = heapq.heappop(heap)
+            if 0 < cells[r, c] <= level:
+                continue
+            cells[r, c] = level
+            marked[r, c] = VISITED_SPACE
+            repaired.add((r, c))
+            for dRow, dCol in NEIGHBORS:
+                nr, nc = r + dRow, c + dCol
+                if isOpen(nr, nc) and \
+                   (cells[nr, nc] == 0 or cells[nr, nc] > level + 1):
+                    heapq.heappush(heap, (level + 1, nr, nc))
+
+        return len(repaired)
+
+    def plan(self, start, goal, mode=None):
+        '''
+        Follows the potential field from the start location towards the goal
+        location and returns the x and y coordinates of the path taken. The
+        field itself is left untouched, so the planner can be reused. With
+        mode set to DESCENT_MODE the path is found by planDescent() instead
+        of the weighted neighbor scores, and it is the configuration's mode
+        by default.
+        '''
+        if mode is None:
+            mode = self.config.mode
+        with self.metrics.phase('plan'):
+            if mode == DESCENT_MODE:
+                pathXs, pathYs = self.planDescent(start, goal)
+            else:
+                pathXs, pathYs = self.planScores(start, goal)
+
+        # Only the weighted neighbor scores give up after the most steps
+        endX, endY = (pathXs[-1], pathYs[-1]) if pathXs else start
+        self.metrics.set(steps=len(pathXs),
+                         hitMaxSteps=mode != DESCENT_MODE and
+                                     len(pathXs) > self.config.maxSteps,
+                         finalDistance=euclideanDistance(endX, endY, *goal))
+        return pathXs, pathYs
+
+    def planScores(self, start, goal):
+        '''
+        Steps from the start location to whichever neighbor scores best on
+        distance to the goal, potential and originality until the goal is
+        close or the configuration's most steps have been taken. Returns the
+        x and y coordinates of the path taken.
+        '''
+        (curX, curY), (goalX, goalY) = start, goal
+        pathXs, pathYs = [], []
+        config = self.config
+        pathIndex = PathIndex(self.shape, self.origin, self.resolution,
+                              config.originalityBucket)
+        d = self.resolution
+        K, G, O = (config.distanceWeight, config.potentialWeight,
+                   config.originalityWeight)
+
+        # Compute distance from current location to goal
+        curDist = euclideanDistance(curX, curY, goalX, goalY)
+        totalDist = curDist
+
+        # Keep track of number of steps taken by robot
+        stepsTaken = 0
+        nextReport = self.progress.start('plan')
+
+        # While we're sufficiently far away from goal location or haven't
+        # taken the maximum number of steps we allow before giving up
+        while curDist >= config.closeThreshold and \
+              stepsTaken <= config.maxSteps:
+            # Define points in every direction of current point
+            pN  = curX, curY + d
+            pS  = curX, curY - d
+            pW  = curX - d, curY
+            pE  = curX + d, curY
+            pNW = curX - d, curY + d
+            pSW = curX - d, curY - d
+            pNE = curX + d, curY + d
+            pSE = curX + d, curY - d
+            ps  = [pN, pS, pW, pE, pNW, pSW, pNE, pSE]
+
+            candidates = []
+            for (pX, pY) in ps:
+                # Get indices of data related to this point
+                row, col = self.getIndexForPoint((pX, pY))
+
+                # Skip points that are outside the grid or the boundary of
+                # environment and points inside an obstacle
+                if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+                    continue
+                if self.marked[row, col] == BOUNDARY_SPACE or \
+                   self.marked[row, col] == OBSTACLE_SPACE:
+                    continue
+
+                # Skip points that are already in the path
+                if (pX, pY) in pathIndex:
+                    continue
+
+                candidates.append((pX, pY, row, col))
+
+            # Deduct points if we're just going to places we've already been
+            originalityScores = pathIndex.sumDistances(
+                (curX, curY), [(pX, pY) for (pX, pY, _, _) in candidates])
+
+            maxScore, maxNeighbor = 0, 0
+            for (pX, pY, row, col), originalityScore in \
+                    zip(candidates, originalityScores):
+                # Compute distance to goal from this point
+                pDist = euclideanDistance(pX, pY, goalX, goalY)
+                distScore = K * (totalDist - pDist)
+
+                # See what the potential value for this point is
+                potentialScore = G * float(self.cells[row, col])
+
+                # Normalize and multiply by the originality factor
+                originalityScore *= (O / (len(pathXs) + 1))
+
+                # Score for this neighbor selection
+                curScore = distScore + potentialScore + originalityScore
+
+                # Update new maximum
+                if curScore > maxScore:
+                    maxScore = curScore
+                    maxNeighbor = pY, pX
+
+            if maxNeighbor == 0:
+                break
+
+            # Add new location to the path
+            curY, curX = maxNeighbor
+            pathXs.append(curX)
+            pathYs.append(curY)
+            pathIndex.add((curX, curY))
+
+            # Report progress of path finding...
+            curDist = euclideanDistance(curX, curY, goalX, goalY)
+            if stepsTaken >= nextReport:
+                nextReport = self.progress.update(stepsTaken,
+                                                  away=round(curDist, 3))
+
+            # Increment the number of total steps so that we don't keep
+            # looking for paths forever
+            stepsTaken += 1
+
+        self.progress.finish(stepsTaken, away=round(curDist, 3))
+        if curDist > config.closeThreshold:
+            print('[WARNING]: Algorithm failed to find path from start ' +
+                  'location to goal location.')
+
+        return pathXs, pathYs
+
+    def computeGoalField(self, goal):
+        '''
+        Runs a wavefront seeded from the goal cell over every cell that is not
+        BOUNDARY_SPACE or OBSTACLE_SPACE. Returns a grid holding the number of
+        steps from each cell to the goal plus one, or 0 where the goal cannot
+        be reached.
+        '''
+        goalField, _ = self.computeGoalsField([goal])
+        return goalField
+
+    def computeGoalsField(self, goals):
+        '''
+        Runs a single wavefront seeded from the cells of all the goals at once
+        over every cell that is not BOUNDARY_SPACE or OBSTACLE_SPACE. Returns
+        a grid holding the number of steps from each cell to its nearest goal
+        plus one, or 0 where no goal can be reached, and a grid holding the
+        position in goals of that goal, or -1. Ties go to the goal listed
+        first. Each level is expanded as a whole with array operations.
+        '''
+        rows, cols = self.shape
+        width = cols + 2
+        goalField = np.zeros((rows + 2) * width, dtype=np.uint32)
+        owners = np.full((rows + 2) * width, -1, dtype=np.int32)
+
+        # Pad the grid with a ring of blocked cells so that flat neighbor
+        # offsets never wrap around to the other side of a row
+        unreached = np.zeros((rows + 2, width), dtype=bool)
+        unreached[1:-1, 1:-1] = (self.marked != BOUNDARY_SPACE) & \
+                                (self.marked != OBSTACLE_SPACE)
+        unreached = unreached.ravel()
+        offsets = np.array([dRow * width + dCol for dRow, dCol in NEIGHBORS])
+
+        # Goals are seeded in reverse so the first of any sharing a cell owns it
+        for i in reversed(range(len(goals))):
+            row, col = self.getIndexForPoint(goals[i])
+            cell = (row + 1) * width + col + 1
+            if 0 <= row < rows and 0 <= col < cols and unreached[cell]:
+                owners[cell] = i
+        frontier = np.flatnonzero(owners >= 0)
+
+        level = 1
+        while frontier.size:
+            unreached[frontier] = False
+            goalField[frontier] = level
+
+            # Each neighbor reached is owned by the first goal reaching it
+            neighbors = (frontier[:, None] + offsets).ravel()
+            sources = np.repeat(owners[frontier], len(offsets))
+            isNew = unreached[neighbors]
+            neighbors, sources = neighbors[isNew], sources[isNew]
+            order = np.lexsort((sources, neighbors))
+            frontier, first = np.unique(neighbors[order], return_index=True)
+            owners[frontier] = sources[order][first]
+            level += 1
+
+        return goalField.reshape(rows + 2, width)[1:-1, 1:-1], \
+               owners.reshape(rows + 2, width)[1:-1, 1:-1]
+
+    def descend(self, start, goalField, owners=None, owner=None):
+        '''
+        Walks from the start down the levels of goalField one neighbor at a
+        time, breaking ties towards the cell with the highest potential so
+        the path keeps clear of obstacles, and only through cells of the
+        given owner if owners is given. Returns the x and y coordinates of
+        the path taken, which is empty if the start cannot reach a goal.
+        '''
+        rows, cols = self.shape
+        (curX, curY) = start
+        pathXs, pathYs = [], []
+
+        row, col = self.getIndexForPoint(start)
+        if not (0 <= row < rows and 0 <= col < cols) or \
+           goalField[row, col] == 0:
+            print('[WARNING]: Algorithm failed to find path from start ' +
+                  'location to goal location.')
+            return pathXs, pathYs
+
+        level = int(goalField[row, col])
+        while level > 1:
+            maxPotential, maxNeighbor = -1, None
+            for dRow, dCol in NEIGHBORS:
+                r, c = row + dRow, col + dCol
+                if 0 <= r < rows and 0 <= c < cols and \
+                   goalField[r, c] == level - 1 and \
+                   (owners is None or owners[r, c] == owner) and \
+                   float(self.cells[r, c]) > maxPotential:
+                    maxPotential = float(self.cells[r, c])
+                    maxNeighbor = dRow, dCol
+
+            # Add new location to the path
+            dRow, dCol = maxNeighbor
+            row, col, level = row + dRow, col + dCol, level - 1
+            curX = curX + dCol * self.resolution
+            curY = curY - dRow * self.resolution
+            pathXs.append(curX)
+            pathYs.append(curY)
+
+        return pathXs, pathYs
+
+    def planDescent(self, start, goal):
+        '''
+        Seeds a wavefront from the goal and walks from the start down its
+        levels. Every step brings the path one cell closer to the goal, so it
+        always reaches the goal when the goal is reachable. Returns the x and
+        y coordinates of the path taken.
+        '''
+        return self.descend(start, self.computeGoalField(goal))
+
+    def planNearest(self, start, goals, goalsField=None):
+        '''
+        Returns the position in goals of the goal nearest to the start that
+        it can reach, or None if it can reach none of them, along with the x
+        and y coordinates of the path to it. The field of the goals from
+        computeGoalsField() can be given to plan from many starts while only
+        propagating it once.
+        '''
+        with self.metrics.phase('planNearest'):
+            if goalsField is None:
+                goalsField = self.computeGoalsField(goals)
+            goalField, owners = goalsField
+
+            row, col = self.getIndexForPoint(start)
+            rows, cols = self.shape
+            owner = None
+            if 0 <= row < rows and 0 <= col < cols and owners[row, col] >= 0:
+                owner = int(owners[row, col])
+            pathXs, pathYs = self.descend(start, goalField, owners, owner)
+
+        self.metrics.set(steps=len(pathXs), nearestGoal=owner)
+        return owner, pathXs, pathYs
+
+def getPlanner(boundary, obstacles, metrics=None, config=None):
+    '''
+    Returns a planner for the room with the RunConfig config, loading its
+    field from the field cache when an earlier run already computed it and
+    caching it otherwise. Time spent on the cache is recorded in metrics
+    along with the planner's own.
+    '''
+    if metrics is None:
+        metrics = PlannerMetrics()
+
+    key = getFieldKey(boundary, obstacles, config)
+    with metrics.phase('loadField'):
+        field = loadField(key)
+    metrics.set(cached=field is not None)
+    if field is not None:
+        cells, marked = field
+        print('Loaded cached field of the environment...')
+        return Planner(boundary, obstacles, cells=cells, marked=marked,
+                       metrics=metrics, config=config)
+
+    planner = Planner(boundary, obstacles, metrics=metrics, config=config)
+    with metrics.phase('saveField'):
+        saveField(key, planner.cells, planner.marked)
+    return planner
+
+def loadEnvironment(directory='.'):
     '''
-    Returns index in QUEUE associated with a given point, p.
+    Reads the room boundary, the room obstacles and the start and goal
+    locations saved by getEnvironment.py to the given directory.
     '''
-    x, y = p
-    row = len(MARKED) - int((y + WINDOW_SIZE / 2) / D) - 1
-    col = int((x + WINDOW_SIZE / 2) / D)
-    return row, col
+    with open (os.path.join(directory, ROOM_BOUNDARY_OUTPUT), 'r') as f:
+        boundary = json.load(f)
+    with open(os.path.join(directory, ROOM_OBSTACLES_OUTPUT), 'r') as f:
+        obstacles = json.load(f)
+    with open(os.path.join(directory, LOCATION_OUTPUT), 'r') as f:
+        start, goal = json.load(f)
+    return boundary, obstacles, tuple(start), tuple(goal)
 
-def inQueue(p):
+def getFieldImage(planner):
     '''
-    Returns True if the point is already in the queue for any level.
+    Returns the planner's potential sampled down to at most PLOT_PIXELS cells
+    a side, taking every n-th row and column so it costs the same however
+    fine the grid is, along with its (left, right, bottom, top) extent in
+    world coordinates.
     '''
-    return p in [pt for (pt, level) in QUEUE]
+    step = max(1, int(math.ceil(float(max(planner.shape)) / PLOT_PIXELS)))
+    image = np.asarray(planner.cells)[::step, ::step]
+    left, bottom = planner.origin
+    right = left + planner.shape[1] * planner.resolution
+    top = bottom + planner.shape[0] * planner.resolution
+    return image, (left, right, bottom, top)
 
-def addPointsOnInterior(p1, p2):
+def drawField(image, extent, title):
     '''
-    This function computes the equation of the line connecting p1 and p2. It 
-    then adds all of the points D to the interior of the line to QUEUE so 
-    that they can be marked.
+    Returns a new figure and the image drawing the sampled potential over
+    the room in world coordinates.
     '''
-    global QUEUE
-    (x1, y1), (x2, y2) = p1, p2
-    if (x2 - x1) == 0: 
-        m = sys.maxint
+    # Plotting libraries are slow to import, so only load them when plotting
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(PLOT_PIXELS / PLOT_DPI,
+                                    PLOT_PIXELS / PLOT_DPI), dpi=PLOT_DPI)
+    drawn = ax.imshow(image, cmap='YlOrRd', extent=extent, origin='upper',
+                      interpolation='nearest', vmin=0,
+                      vmax=max(float(image.max()), 1.0))
+    ax.set_title(title)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    return fig, drawn
+
+def plotFieldPath(planner, start, goal, pathXs, pathYs,
+                  output=PLOT_OUTPUT):
+    '''
+    Plots a heatmap of the planner's potential with the path from start to
+    goal drawn over it and saves it to output. The potential is drawn as a
+    single image sampled down to the size of the plot, so the time taken
+    does not grow with the number of cells.
+    '''
+    image, extent = getFieldImage(planner)
+    fig, _ = drawField(image, extent, 'Wave Front Potential and Path')
+
+    # Plot robot's path from start to goal, then the start and goal locations
+    ax = fig.axes[0]
+    ax.plot(pathXs, pathYs, linewidth=3)
+    ax.plot([start[0]], [start[1]], marker='o', color='green', markersize=5)
+    ax.plot([goal[0]], [goal[1]], marker='o', color='red', markersize=5)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+
+    # Save plot
+    fig.savefig(output)
+    return fig
+
+def saveWavefrontFrames(planner, output=FRAME_OUTPUT, count=FRAME_COUNT):
+    '''
+    Saves count frames of the wavefront growing out from the obstacles, the
+    i-th to output % i, each showing the cells whose potential is within an
+    evenly spaced fraction of the highest. Returns the saved filenames.
+    '''
+    import matplotlib.pyplot as plt
+
+    image, extent = getFieldImage(planner)
+    fig, drawn = drawField(image, extent, 'Wave Front Growth')
+    highest = float(image.max())
+
+    filenames = []
+    for i in range(count):
+        level = highest * (i + 1) / count
+        drawn.set_data(np.where(image <= level, image, 0))
+        filenames.append(output % i)
+        fig.savefig(filenames[-1])
+    plt.close(fig)
+    return filenames
+
+if __name__ == '__main__':
+
+    startTime = time.time() # Start the timer
+
+    # Settings of the run come from --config FILE and --NAME=VALUE flags
+    CONFIG, ARGS = parseConfig(sys.argv[1:])
+
+    # Profile the whole run on request
+    profiler = None
+    if '--profile' in ARGS:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # Load in data from custom user specification
+    METRICS = PlannerMetrics()
+    with METRICS.phase('load'):
+        ROOM_BOUNDARY, ROOM_OBSTACLES, START, GOAL = loadEnvironment()
+    print('\nRead in environment data...')
+
+    PLANNER = getPlanner(ROOM_BOUNDARY, ROOM_OBSTACLES, METRICS, CONFIG)
+    if '--goals' in ARGS:
+        # Head for whichever of the goals listed in the file is nearest
+        with open(ARGS[ARGS.index('--goals') + 1], 'r') as f:
+            GOALS = [tuple(goal) for goal in json.load(f)]
+        NEAREST, PATH_XS, PATH_YS = PLANNER.planNearest(START, GOALS)
+        if NEAREST is not None:
+            GOAL = GOALS[NEAREST]
+            print('Nearest goal location is ' + str(GOAL) + '...')
     else:
-        m = (y2 - y1) / (x2 - x1)
-
-    # Equation of the line connecting p1 and p2
-    def y(x):
-        return m * (x - x1) + y1
-
-    leftX, rightX = (x1, x2) if x1 < x2 else (x2, x1)
-    linePoints = [(x, y(x)) for x in np.arange(leftX, rightX, D)]
-    for (x, y) in linePoints:
-        # Define points around the point on the line
-        pW  = (x - D, y)
-        pE  = (x + D, y)
-        pNW = (x - D, y + D)
-        pSW = (x - D, y - D)
-        pNE = (x + D, y + D)
-        pSE = (x + D, y - D)
-
-        # Find exact cells we need to 
-        ps = [pW, pE, pNW, pSW, pNE, pSW]
-
-        # Add unmarked cells around the current cell to the queue
-        for p in ps: 
-            row, col = getIndexForPoint(p)
-            if MARKED[row][col] == FREE_SPACE and not inQueue(p):
-                QUEUE.append((p, 1))
-
-# Mark all the points that aren't in the boundary
-numMarked = 0
-for x in WINDOW_SIDE:
-    for y in WINDOW_SIDE:
-        row, col = getIndexForPoint((x, y))
-        # If point is not within the boundary of the environment, mark it
-        if not BOUNDARY.contains_point((x, y)):
-            MARKED[row][col] = BOUNDARY_SPACE
-            numMarked += 1
-        else: 
-            for obs in OBSTACLES:
-                # If point is inside one of the obstacles within environment
-                # boundary, mark it
-                if obs.contains_point((x, y)):
-                    MARKED[row][col] = OBSTACLE_SPACE
-                    numMarked += 1
-                    continue
-print('Marked all unreachable points in the environment...')
-
-# Identify points on the interior of the boundary
-p1 = ROOM_BOUNDARY[0]
-for p2 in ROOM_BOUNDARY[1:]:
-    addPointsOnInterior(p1, p2)
-    p1 = p2 # Move p1 forward
-print('Computed points on interior of environment boundary...')
-
-# Identify points on exterior of each obstacle and interior of boundary
-for obs in ROOM_OBSTACLES:
-    p1 = obs[0]
-    for p2 in obs[1:]:
-        addPointsOnInterior(p1, p2)
-        p1 = p2 # Move p1 forward
-print('Computed points on immediate exterior of each obstacle...')
-
-# Continuously mark all the cells and set their potential levels until we've 
-# marked every cell
-reachableToMark = TOTAL_CELLS - numMarked
-numMarked = 0
-while len(QUEUE) != 0: 
-    # Get celll off the queue
-    cell, l = QUEUE.pop(0)
-    cellX, cellY = cell
-    row, col = getIndexForPoint(cell)
-
-    # Skip over this cell if it's in a boundary, obstacle, or has been visited
-    if MARKED[row][col] in [BOUNDARY_SPACE, OBSTACLE_SPACE, VISITED_SPACE]:
-        continue
-
-    # Add level to this cell's entry and mark it as visited
-    CELLS[row][col] = l
-    MARKED[row][col] = VISITED_SPACE
-    numMarked += 1
-
-    # Define points around current point
-    pN  = cellX, cellY + D
-    pS  = cellX, cellY - D
-    pW  = cellX - D, cellY
-    pE  = cellX + D, cellY
-    pNW = cellX - D, cellY + D
-    pSW = cellX - D, cellY - D
-    pNE = cellX + D, cellY + D
-    pSE = cellX + D, cellY - D
-    ps  = [pN, pS, pW, pE, pNW, pSW, pNE, pSE]
-
-    # Add unmarked cells around the current cell to the queue
-    for p in ps: 
-        row, col = getIndexForPoint(p)
-        if MARKED[row][col] == FREE_SPACE and not inQueue(p):
-            QUEUE.append((p, l + 1))
-
-    per = str(round(numMarked / reachableToMark, 3) * 100) 
-    pro = per + '% (' + str(len(QUEUE)) + ')'
-    m = ('Marking reachable points with their potential. ' + pro + '...    \r')
-    sys.stdout.write(m)
-    sys.stdout.flush()
-
-print('')
-# Start robot at start location given by user
-curX, curY = START_X, START_Y
-
-# Add the start location to the path
-curRow, curCol = getIndexForPoint((curY, curX))
-PATH_XS, PATH_YS = [], []
-
-# Compute distance from current location to goal
-curDist = euclideanDistance(curX, curY, GOAL_X, GOAL_Y)
-totalDist = curDist
-
-# Keep track of number of steps taken by robot
-stepsTaken = 0
-
-# While we're sufficiently far away from goal location or haven't taken 
-# the maximum number of steps we allow before giving up
-while curDist >= CLOSE_PATH_THRESHOLD and stepsTaken <= MAX_NUM_STEPS:
-    # Define points in every direction of current point
-    pN  = curX, curY + D
-    pS  = curX, curY - D
-    pW  = curX - D, curY
-    pE  = curX + D, curY
-    pNW = curX - D, curY + D
-    pSW = curX - D, curY - D
-    pNE = curX + D, curY + D
-    pSE = curX + D, curY - D
-    ps  = [pN, pS, pW, pE, pNW, pSW, pNE, pSE]
-
-    maxScore, maxNeighbor = 0, 0
-    for (pX, pY) in ps:
-        # Get indices of data related to this point
-        row, col = getIndexForPoint((pX, pY))
-
-        # Skip points that are outside boundary of environment and points 
-        # inside an obstacle
-        if MARKED[row][col] == BOUNDARY_SPACE or \
-           MARKED[row][col] == OBSTACLE_SPACE:
-            continue
-
-        # Skip points that are already in the path
-        if (pX, pY) in zip(PATH_XS, PATH_YS):
-            continue
-
-        # Compute distance to goal from this point
-        pDist = euclideanDistance(pX, pY, GOAL_X, GOAL_Y)
-        distScore = K * (totalDist - pDist)
-
-        # See what the potential value for this point is
-        potentialScore = G * CELLS[row][col]
-
-        # Deduct points if we're just going to places we've already been
-        originalityScore = sum([euclideanDistance(pX, pY, pathX, pathY) for \
-                                (pathX, pathY) in zip(PATH_XS, PATH_YS)]) 
-        # Normalize and multiply by the originality factor
-        originalityScore *= (O / (len(PATH_XS) + 1)) 
-
-        # Score for this neighbor selection
-        curScore = distScore + potentialScore + originalityScore
-
-        # Update new maximum
-        if curScore > maxScore:
-            maxScore = curScore
-            maxNeighbor = pY, pX
-
-    if maxNeighbor == 0:
-        break
-
-    # Add new location to the path
-    curY, curX = maxNeighbor
-    PATH_XS.append(curX)
-    PATH_YS.append(curY)
-
-    # Report to console progress of path finding...
-    curDist = euclideanDistance(curX, curY, GOAL_X, GOAL_Y)
-    pro = str(round((totalDist - curDist) / curDist, 3)) + '% ' 
-    pro += '(' + str(stepsTaken) + ' steps, ' + str(round(curDist, 3)) + ' away)'
-    sys.stdout.write('Computing path from start to goal. ' + pro + '...\r')
-    sys.stdout.flush()
-
-    # Increment the number of total steps so that we don't keep looking for 
-    # paths forever
-    stepsTaken += 1
-
-if euclideanDistance(PATH_XS[-1], PATH_YS[-1], GOAL_X, GOAL_Y) > CLOSE_PATH_THRESHOLD:
-    print('[WARNING]: Algorithm failed to find path from start location to' + \
-          ' goal location.')
-
-# Convert points to their indices 
-PATH_XS = [getIndexForPoint((x, y))[1] for (x, y) in zip(PATH_XS, PATH_YS)]
-PATH_YS = [int(WINDOW_SIZE / D) - getIndexForPoint((x, y))[0] for (x, y) in zip(PATH_XS, PATH_YS)]
-
-# Plot heatmap of repulsive potential
-hm = sns.heatmap(CELLS, cmap='YlOrRd', cbar=False, 
-                 xticklabels=False, yticklabels=False)
-hm.set_title('Wave Front Potential and Path')
-
-# Plot robot's path from start to goal
-plt.plot(PATH_XS, PATH_YS, linewidth=3)
-
-# Compute cells associated with start and goal locations, then plot start and 
-# goal locations
-startRow, startCol = getIndexForPoint((START_X, START_Y))
-goalRow, goalCol = getIndexForPoint((GOAL_X, GOAL_Y))
-plt.plot([startCol], [int(WINDOW_SIZE / D) - startRow], marker='o', 
-         color='green', markersize=5)
-plt.plot([goalCol], [int(WINDOW_SIZE / D) - goalRow], marker='o', 
-         color='red', markersize=5)
-
-# Save plot
-plt.savefig('wavefront_potential.png')
-print('Generated heatmap of field and path from start to goal...')
-
-elapsedTime = str(round(time.time() - startTime, 3))
-print('\n\n' + '-' * 65 + '\n')
-print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
-
-plt.show()
+        PATH_XS, PATH_YS = PLANNER.plan(START, GOAL)
+
+    # Headless runs only emit the path and the field, never a picture
+    headless = CONFIG.headless or '--headless' in ARGS
+    if headless:
+        with open(CONFIG.pathOutput, 'w') as wr:
+            json.dump([[x, y] for (x, y) in zip(PATH_XS, PATH_YS)], wr)
+        np.save(CONFIG.fieldOutput, PLANNER.cells)
+        print('Saved path and field to ' + CONFIG.pathOutput + ' and ' +
+              CONFIG.fieldOutput + '...')
+    else:
+        with METRICS.phase('plot'):
+            plotFieldPath(PLANNER, START, GOAL, PATH_XS, PATH_YS,
+                          output=CONFIG.plotOutput)
+        print('Generated heatmap of field and path from start to goal...')
+        if '--frames' in ARGS:
+            with METRICS.phase('frames'):
+                FRAMES = saveWavefrontFrames(PLANNER, CONFIG.frameOutput)
+            print('Saved ' + str(len(FRAMES)) + ' frames of the wavefront ' +
+                  'growing to ' + CONFIG.frameOutput + '...')
 
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(CONFIG.profileOutput)
+        print('Saved profile of the run to ' + CONFIG.profileOutput + '...')
+    if '--metrics' in ARGS:
+        METRICS.save(CONFIG.metricsOutput)
+        print('Saved metrics of the run to ' + CONFIG.metricsOutput + '...')
 
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
 
+    if not headless:
+        import matplotlib.pyplot as plt
+        plt.show()
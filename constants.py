@@ -9,6 +9,8 @@ MAX_NUM_OBSTACLES      = 5
 MAX_NUM_OBSTACLE_SIDES = 10
 MIN_OBSTACLE_RADIUS    = 5.0
 MAX_OBSTACLE_RADIUS    = 50.0
+OBSTACLE_BUCKET        = 100.0 # Side of the buckets indexing obstacles
+MAX_PLACEMENT_TRIES    = 1000
 CLOSE_LOOP_THRESHOLD   = 2.5
 CLOSE_PATH_THRESHOLD   = 10.0
 
@@ -18,6 +20,18 @@ P                      = 3.0 # Padding for randomized obstacles
 K                      = 1.0 # Constant weight for distance score
 G                      = 8.0 # Constant weight for potential score
 O                      = 2.0 # Constant weight for originality score
+ORIGINALITY_BUCKET     = 8   # Side in cells of buckets summarizing a path
+
+# Path planning modes
+SCORE_MODE             = 'score'   # Follow weighted neighbor scores
+DESCENT_MODE           = 'descent' # Descend a wavefront seeded from the goal
+PATH_MODE              = SCORE_MODE
+
+# Engines propagating the potential
+BFS_ENGINE             = 'bfs'       # Visit one cell at a time from a queue
+CHAMFER_ENGINE         = 'chamfer'   # Same levels by a transform over rows
+OCTILE_ENGINE          = 'octile'    # Transform counting diagonals as sqrt(2)
+FIELD_ENGINE           = BFS_ENGINE
 
 # 
 BOUNDARY_SPACE         = 0
@@ -25,7 +39,60 @@ OBSTACLE_SPACE         = 1
 FREE_SPACE             = 2
 VISITED_SPACE          = 3
 
+# Coarse-to-fine planning
+HIERARCHY_FACTOR       = 4 # Side of a coarse cell in fine cells
+HIERARCHY_MARGIN       = 3 # Coarse cells kept on either side of a coarse path
+
+# Grid storage
+GRID_STORAGE           = None # Directory to memory-map grids in, or None
+BAND_ROWS              = 256  # Rows of the grid processed at a time
+GRID_MARGIN            = 2    # Cells kept around the bounding box of a room
+
+# Field cache
+FIELD_VERSION          = 3 # Bump whenever the way fields are computed changes
+FIELD_CACHE_DIR        = '.field_cache'
+FIELD_CACHE_SIZE       = 512 * 1024 ** 2 # Bytes of fields kept on disk
+
+# Field files
+FIELD_FORMAT_VERSION   = 1  # Bump whenever the layout of field files changes
+FIELD_ALIGNMENT        = 64 # Bytes arrays in field files are aligned to
+
+# Planning server
+SERVER_ADDRESS         = 'wavefront.sock' # Unix socket, or HOST:PORT for TCP
+SERVER_ENVIRONMENTS    = 8    # Environments kept resident at once
+SERVER_PROCESSES       = None # Processes planning paths, None for one per CPU
+
 # Output files
 ROOM_BOUNDARY_OUTPUT   = 'room_boundary.json'
 ROOM_OBSTACLES_OUTPUT  = 'room_obstacles.json'
-LOCATION_OUTPUT        = 'location_output.json'
\ No newline at end of file
+LOCATION_OUTPUT        = 'location_output.json'
+BATCH_PATHS_OUTPUT     = 'batch_paths.json'
+SCENARIO_PAIRS_OUTPUT  = 'location_pairs.json'
+PATH_OUTPUT            = 'path_output.json'
+PLOT_OUTPUT            = 'wavefront_potential.png'
+FIELD_OUTPUT           = 'wavefront_potential.npy'
+METRICS_OUTPUT         = 'planner_metrics.jsonl' # Written with --metrics
+PROFILE_OUTPUT         = 'planner.prof'          # Written with --profile
+FRAME_OUTPUT           = 'wavefront_frame_%03d.png' # Written with --frames
+
+# Plotting
+PLOT_PIXELS            = 800 # Pixels a side of plots, and most cells drawn
+PLOT_DPI               = 100
+FRAME_COUNT            = 20  # Frames of wavefront growth saved with --frames
+
+# Progress reporting
+PROGRESS_EVERY         = 1024 # Cells or steps between checks on progress
+PROGRESS_INTERVAL      = 0.1  # Seconds between reports of progress
+
+# Only emit path and field data instead of plotting, also set by --headless
+HEADLESS               = False
+
+# Benchmarks
+BENCHMARK_RESOLUTIONS  = [5.0, 2.5, 1.25] # Values of D to benchmark at
+BENCHMARK_OBSTACLES    = [1, 4, 8]        # Obstacle counts to benchmark with
+BENCHMARK_SEEDS        = [0, 1, 2]        # Seeds of the benchmarked scenarios
+BENCHMARK_PAIRS        = 5                # Paths planned in each scenario
+BENCHMARK_REPEATS      = 3                # Runs a phase keeps its best time of
+BENCHMARK_MIN_SECONDS  = 0.01 # Phases any faster are too short to compare
+BENCHMARK_TOLERANCE    = 1.25 # Slowdown over the baseline that is a regression
+BENCHMARK_OUTPUT       = 'benchmark.json'
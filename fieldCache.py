@@ -0,0 +1,83 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from runConfig import getConfig
+from constants import *
+
+def getFieldKey(boundary, obstacles, config=None):
+    '''
+    Returns the key a field is cached under, a hash of everything the field
+    is computed from: the room and the settings of the RunConfig config it
+    depends on.
+    '''
+    settings = list(getConfig(config).getFieldSettings())
+    spec = json.dumps([FIELD_VERSION, settings, boundary, obstacles])
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+def loadField(key, cacheDir=FIELD_CACHE_DIR):
+    '''
+    Returns the cells and marked grids cached under key, memory-mapped
+    copy-on-write so they can be changed without touching the cache, or None
+    if the field is not cached.
+    '''
+    entry = os.path.join(cacheDir, key)
+    try:
+        cells = np.load(os.path.join(entry, 'cells.npy'), mmap_mode='c')
+        marked = np.load(os.path.join(entry, 'marked.npy'), mmap_mode='c')
+    except (IOError, OSError, ValueError):
+        return None
+
+    # Mark the entry as recently used
+    os.utime(entry, None)
+    return cells, marked
+
+def saveField(key, cells, marked, cacheDir=FIELD_CACHE_DIR,
+              maxSize=FIELD_CACHE_SIZE):
+    '''
+    Caches the cells and marked grids under key, then evicts the least
+    recently used fields until the cache fits in maxSize bytes.
+    '''
+    if not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+
+    # Write the entry to the side first so readers never see half of it
+    tmp = tempfile.mkdtemp(dir=cacheDir, prefix='.tmp')
+    np.save(os.path.join(tmp, 'cells.npy'), cells)
+    np.save(os.path.join(tmp, 'marked.npy'), marked)
+    try:
+        os.rename(tmp, os.path.join(cacheDir, key))
+    except OSError:
+        # Another run cached the same field first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evictFields(cacheDir, maxSize)
+
+def evictFields(cacheDir=FIELD_CACHE_DIR, maxSize=FIELD_CACHE_SIZE):
+    '''
+    Removes the least recently used fields from the cache until the total
+    size of the ones left is at most maxSize bytes.
+    '''
+    entries = []
+    for key in os.listdir(cacheDir):
+        entry = os.path.join(cacheDir, key)
+        if key.startswith('.') or not os.path.isdir(entry):
+            continue
+        size = sum(os.path.getsize(os.path.join(entry, f))
+                   for f in os.listdir(entry))
+        entries.append((os.path.getmtime(entry), size, entry))
+
+    # Oldest entries first
+    entries.sort()
+    total = sum(size for (_, size, _) in entries)
+    for (_, size, entry) in entries:
+        if total <= maxSize:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
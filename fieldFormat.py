@@ -0,0 +1,202 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+from computeFieldPath import Planner, getPlanner, loadEnvironment
+from runConfig import parseConfig
+from constants import *
+
+# Every field file starts with the magic bytes, the version of the format and
+# the length of the JSON header describing the arrays that follow it
+FIELD_MAGIC  = b'WFPF'
+FIELD_PREFIX = struct.Struct('<4sHI')
+
+def packPolygons(polygons):
+    '''
+    Returns the vertices of all the polygons as one (n, 2) array along with
+    the offsets in it where each polygon starts and the last one ends.
+    '''
+    offsets = np.cumsum([0] + [len(polygon) for polygon in polygons])
+    vertices = np.array([p for polygon in polygons for p in polygon],
+                        dtype=np.float64).reshape(-1, 2)
+    return vertices, offsets.astype(np.int64)
+
+def unpackPolygons(vertices, offsets):
+    '''
+    Returns the polygons packed by packPolygons() as lists of vertices.
+    '''
+    return [[tuple(p) for p in vertices[start:stop].tolist()]
+            for (start, stop) in zip(offsets[:-1], offsets[1:])]
+
+def writeFieldFile(filename, planner, start=None, goal=None, compress=False):
+    '''
+    Saves the room, the grid and the field of the planner, along with the
+    start and goal locations if given, to a single binary file. Arrays are
+    aligned to FIELD_ALIGNMENT bytes so they can be memory-mapped, unless
+    compress is set, which zlib compresses the marked and cells grids to
+    make the file small enough to ship.
+    '''
+    boundary = np.array(planner.roomBoundary, dtype=np.float64).reshape(-1, 2)
+    vertices, offsets = packPolygons(planner.roomObstacles)
+    arrays = [('boundary', boundary, False),
+              ('obstacleVertices', vertices, False),
+              ('obstacleOffsets', offsets, False),
+              ('marked', np.asarray(planner.marked), compress),
+              ('cells', np.asarray(planner.cells), compress)]
+
+    header = {'version': FIELD_FORMAT_VERSION,
+              'resolution': planner.resolution,
+              'origin': list(planner.origin),
+              'shape': list(planner.shape),
+              'engine': planner.engine,
+              'start': None if start is None else list(start),
+              'goal': None if goal is None else list(goal),
+              'arrays': {}}
+
+    # Lay the arrays out one after another, each starting on an aligned
+    # offset once the header is known
+    blobs = []
+    for (name, a, compressed) in arrays:
+        data = np.ascontiguousarray(a).tobytes()
+        if compressed:
+            data = zlib.compress(data)
+        blobs.append((name, data))
+        header['arrays'][name] = {'dtype': a.dtype.str, 'shape': list(a.shape),
+                                  'compression': 'zlib' if compressed else None,
+                                  'size': len(data)}
+
+    def align(offset):
+        return -(-offset // FIELD_ALIGNMENT) * FIELD_ALIGNMENT
+
+    # Offsets change the length of the header, so settle them first
+    headerSize = 0
+    while True:
+        offset = align(FIELD_PREFIX.size + headerSize)
+        for (name, data) in blobs:
+            header['arrays'][name]['offset'] = offset
+            offset = align(offset + len(data))
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= headerSize:
+            break
+        headerSize = len(encoded)
+    encoded = encoded.ljust(headerSize)
+
+    with open(filename, 'wb') as wr:
+        wr.write(FIELD_PREFIX.pack(FIELD_MAGIC, FIELD_FORMAT_VERSION,
+                                   headerSize))
+        wr.write(encoded)
+        for (name, data) in blobs:
+            wr.seek(header['arrays'][name]['offset'])
+            wr.write(data)
+
+def readFieldHeader(filename):
+    '''
+    Returns the JSON header of the field file, checking that it is one this
+    version of the format can read.
+    '''
+    with open(filename, 'rb') as f:
+        prefix = f.read(FIELD_PREFIX.size)
+        if len(prefix) < FIELD_PREFIX.size:
+            raise ValueError(filename + ' is not a field file')
+        magic, version, headerSize = FIELD_PREFIX.unpack(prefix)
+        if magic != FIELD_MAGIC:
+            raise ValueError(filename + ' is not a field file')
+        if version > FIELD_FORMAT_VERSION:
+            raise ValueError(filename + ' has field format version ' +
+                             str(version) + ', newer than ' +
+                             str(FIELD_FORMAT_VERSION))
+        return json.loads(f.read(headerSize).decode('utf-8'))
+
+def readArray(filename, spec):
+    '''
+    Returns the array described by spec in the field file. Uncompressed
+    arrays are memory-mapped copy-on-write, so nothing is read until it is
+    used and changes never reach the file.
+    '''
+    dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+    if spec['compression'] is None:
+        if spec['size'] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode='c',
+                         offset=spec['offset'], shape=shape)
+
+    with open(filename, 'rb') as f:
+        f.seek(spec['offset'])
+        data = bytearray(zlib.decompress(f.read(spec['size'])))
+    return np.frombuffer(data, dtype=dtype).reshape(shape)
+
+def readFieldFile(filename, config=None):
+    '''
+    Returns a planner with the RunConfig config over the room and field
+    saved in the field file, along with the start and goal locations saved
+    with it, which are None if there were none. The resolution and engine
+    the field was computed with override the configuration's.
+    '''
+    header = readFieldHeader(filename)
+    arrays = dict((name, readArray(filename, spec))
+                  for (name, spec) in header['arrays'].items())
+
+    boundary = [tuple(p) for p in arrays['boundary'].tolist()]
+    obstacles = unpackPolygons(arrays['obstacleVertices'],
+                               arrays['obstacleOffsets'])
+    planner = Planner(boundary, obstacles, cells=arrays['cells'],
+                      marked=arrays['marked'],
+                      resolution=header['resolution'],
+                      origin=tuple(header['origin']),
+                      shape=tuple(header['shape']), engine=header['engine'],
+                      config=config)
+    start = None if header['start'] is None else tuple(header['start'])
+    goal = None if header['goal'] is None else tuple(header['goal'])
+    return planner, start, goal
+
+def exportEnvironment(filename, directory='.'):
+    '''
+    Writes the room and the start and goal locations in the field file to
+    the JSON files getEnvironment.py saves, in the given directory.
+    '''
+    planner, start, goal = readFieldFile(filename)
+    with open(os.path.join(directory, ROOM_BOUNDARY_OUTPUT), 'w') as wr:
+        json.dump(planner.roomBoundary, wr)
+    with open(os.path.join(directory, ROOM_OBSTACLES_OUTPUT), 'w') as wr:
+        json.dump(planner.roomObstacles, wr)
+    if start is not None and goal is not None:
+        with open(os.path.join(directory, LOCATION_OUTPUT), 'w') as wr:
+            json.dump([start, goal], wr)
+
+if __name__ == '__main__':
+
+    # Settings of the run come from --config FILE and --NAME=VALUE flags
+    CONFIG, ARGS = parseConfig(sys.argv[1:])
+    args = [arg for arg in ARGS if not arg.startswith('--')]
+    if len(args) != 2 or args[0] not in ('pack', 'unpack'):
+        print('Usage: python fieldFormat.py pack FIELD_FILE [--compress] ' +
+              '[--config FILE] [--NAME=VALUE ...]\n' +
+              '       python fieldFormat.py unpack FIELD_FILE')
+        exit(1)
+
+    startTime = time.time() # Start the timer
+
+    if args[0] == 'pack':
+        # Import the room from the JSON files of getEnvironment.py
+        ROOM_BOUNDARY, ROOM_OBSTACLES, START, GOAL = loadEnvironment()
+        print('\nRead in environment data...')
+        PLANNER = getPlanner(ROOM_BOUNDARY, ROOM_OBSTACLES, config=CONFIG)
+        writeFieldFile(args[1], PLANNER, START, GOAL,
+                       compress='--compress' in ARGS)
+        print('Saved environment and field to ' + args[1] + '...')
+    else:
+        exportEnvironment(args[1])
+        print('\nSaved environment data from ' + args[1] + ' to ' +
+              ROOM_BOUNDARY_OUTPUT + ', ' + ROOM_OBSTACLES_OUTPUT + ' and ' +
+              LOCATION_OUTPUT + '...')
+
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
@@ -0,0 +1,70 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from getEnvironment import generateRandomEnvironment
+from constants import *
+
+def writeScenario(task):
+    '''
+    Generates the random environment for the given (directory, seed,
+    numPairs, numObstacles) task and saves it to the directory in the same
+    files getEnvironment.py writes, plus every pair in SCENARIO_PAIRS_OUTPUT.
+    '''
+    directory, seed, numPairs, numObstacles = task
+    boundary, obstacles, pairs = generateRandomEnvironment(random.Random(seed),
+                                                           numPairs,
+                                                           numObstacles)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(os.path.join(directory, ROOM_BOUNDARY_OUTPUT), 'w') as wr:
+        json.dump(boundary, wr)
+    with open(os.path.join(directory, ROOM_OBSTACLES_OUTPUT), 'w') as wr:
+        json.dump(obstacles, wr)
+    with open(os.path.join(directory, LOCATION_OUTPUT), 'w') as wr:
+        json.dump(pairs[0], wr)
+    with open(os.path.join(directory, SCENARIO_PAIRS_OUTPUT), 'w') as wr:
+        json.dump(pairs, wr)
+    return directory
+
+def generateScenarios(directory, count, seed=0, numPairs=1, processes=None):
+    '''
+    Writes count random scenarios to numbered directories inside directory
+    using a pool of worker processes. Scenario i is generated from seed + i,
+    so the same seed always gives the same scenarios. Returns the scenario
+    directories.
+    '''
+    tasks = [(os.path.join(directory, 'scenario_' + str(i)), seed + i, numPairs,
+              None) for i in range(count)]
+    pool = Pool(processes)
+    try:
+        chunkSize = max(1, count // (4 * (processes or os.cpu_count())))
+        return pool.map(writeScenario, tasks, chunksize=chunkSize)
+    finally:
+        pool.close()
+        pool.join()
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 3:
+        print('Usage: python generateScenarios.py DIRECTORY COUNT [SEED] ' +
+              '[PAIRS]')
+        exit(1)
+
+    startTime = time.time() # Start the timer
+
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    numPairs = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    scenarios = generateScenarios(sys.argv[1], int(sys.argv[2]), seed, numPairs)
+    print('\nSaved ' + str(len(scenarios)) + ' scenarios to ' + sys.argv[1] +
+          '...')
+
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
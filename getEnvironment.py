@@ -2,12 +2,12 @@
 # Wave Front Potential Path Finder
 # March 2017
 
-import turtle
 import time
 import json
 import math
 import random
 import matplotlib.path as path
+from obstacleIndex import ObstacleIndex
 from constants import *
 
 def printWelcomeMsg():
@@ -212,135 +212,151 @@ def saveWindow():
     cv = turtle.getcanvas()
     cv.postscript(file='environment.ps', colormode='color')
 
-def drawPolygon(turtle, x, y, numSide, radius):
+def getPolygon(x, y, numSide, radius):
     '''
-    Draws a random polygon at the given location with the given radius and the 
-    given number of sides and returns the points in the obstacle.
+    Returns the points of a regular polygon with the given radius and the
+    given number of sides, traced counterclockwise from the given location
+    and closed back at it.
     '''
     obstacle = [(x, y)]
-    sideLen = 2 * radius * math.sin (math.pi / numSide)
-    angle = 360 / numSide
+    sideLen = 2 * radius * math.sin(math.pi / numSide)
+    angle = 2 * math.pi / numSide
+    for side in range(numSide):
+        x += sideLen * math.cos(side * angle)
+        y += sideLen * math.sin(side * angle)
+        obstacle.append((x, y))
+    return obstacle
+
+def drawPolygon(turtle, polygon, color):
+    '''
+    Draws the polygon with the given points filled with the given color.
+    '''
     turtle.penup()
-    turtle.goto(x, y)
+    turtle.goto(polygon[0][0], polygon[0][1])
     turtle.pendown()
     turtle.fill(True)
-    turtle.fillcolor('black')
-    for iter in range (numSide):
-        turtle.forward(sideLen)
-        turtle.left(angle)
-        obstacle.append(turtle.pos())
+    turtle.fillcolor(color)
+    for (x, y) in polygon[1:]:
+        turtle.goto(x, y)
     turtle.fill(False)
-    return obstacle
 
-def randomEnvironmentGenerator():
+def getRandomLocation(rng, boundary, obstacleIndex, bounds):
     '''
-    Draws a random environment.
+    Returns a random location within bounds that is inside the boundary, given
+    as a polygon data structure, and outside every obstacle in obstacleIndex.
     '''
-    # Global variables
-    global ROOM_BOUNDARY, ROOM_OBSTACLES
-    global DRAWING_BOUNDARY, DRAWING_OBSTACLE
-    global START_X, START_Y
-    global START_LOCATION, GOAL_LOCATION
+    (minX, maxX), (minY, maxY) = bounds
+    while True:
+        p = rng.uniform(minX, maxX), rng.uniform(minY, maxY)
+        if boundary.contains_point(p) and not obstacleIndex.containsPoint(p):
+            return p
 
+def generateRandomEnvironment(rng=random, numPairs=1, numObstacles=None):
+    '''
+    Returns a random boundary, random obstacles within it and numPairs random
+    (start, goal) location pairs, using the random number generator rng and
+    no graphics at all. The number of obstacles is random unless
+    numObstacles is given.
+    '''
     # Randomly draw a number of vertices, making sure the selection is even
-    numEnvVertices = int((random.choice(range(4, MAX_NUM_ENV_VERTICES)) / 2) * 2)
-    numObstacles = random.choice(range(1, MAX_NUM_OBSTACLES))
+    numEnvVertices = rng.choice(range(4, MAX_NUM_ENV_VERTICES)) // 2 * 2
+    drawnObstacles = rng.choice(range(1, MAX_NUM_OBSTACLES))
+    if numObstacles is None:
+        numObstacles = drawnObstacles
 
-    # Move about the environment in a clockwise fashion, randomly picking a 
+    # Move about the environment in a clockwise fashion, randomly picking a
     # point in each of the numEnvVertices block regions in the environment
     bSize = int(WINDOW_SIZE / numEnvVertices)
     offSet = int(WINDOW_SIZE / 4)
 
-    # Define constraints on boundaries, moving in clockwise fashion
+    # Define constraints on boundaries, moving in clockwise fashion along the
+    # top half and back along the bottom half
     regions = []
     for i in range(numEnvVertices):
-        if i < numEnvVertices / 2: 
+        if i < numEnvVertices / 2:
             xMin = bSize * i - offSet
             xMax = bSize * (i + 1) - offSet
-        else: 
+        else:
             c = (numEnvVertices - 1) - i
             xMin = bSize * c - offSet
             xMax = bSize * (c + 1) - offSet
-        yMin = - (i / (numEnvVertices / 2)) * offSet
+        yMin = - (i // (numEnvVertices // 2)) * offSet
         yMax = yMin + offSet
         regions.append(((xMin, xMax), (yMin, yMax)))
 
-    # Prepare the turtle to draw the environment boundary on the window
-    startX, startY = 0, 0
-    turtle.pensize(4)
-    turtle.pencolor('blue')
-    turtle.fill(True)
-    turtle.fillcolor('white')
+    # Randomly pick a point in each region and close the loop
+    roomBoundary = [(int(rng.uniform(xMin, xMax)), int(rng.uniform(yMin, yMax)))
+                    for ((xMin, xMax), (yMin, yMax)) in regions]
+    roomBoundary.append(roomBoundary[0])
 
-    # Randomly pick a point in each region and go to it.
-    for i, ((xMin, xMax), (yMin, yMax)) in enumerate(regions): 
-        curX = int(random.uniform(xMin, xMax))
-        curY = int(random.uniform(yMin, yMax))
-        turtle.goto(curX, curY)
-        turtle.pendown()
-        ROOM_BOUNDARY.append((curX, curY))
+    # Organize the boundary into a polygon data structure
+    boundary = path.Path(roomBoundary)
 
-    # Close the loop and fill the environment boundary with white
-    ROOM_BOUNDARY.append((ROOM_BOUNDARY[0][0], ROOM_BOUNDARY[0][1]))
-    turtle.goto(ROOM_BOUNDARY[0][0], ROOM_BOUNDARY[0][1])
-    turtle.fill(False)
+    # Minimum and maximum possible coordinates
+    bounds = ((min([x for (x, y) in roomBoundary]),
+               max([x for (x, y) in roomBoundary])),
+              (min([y for (x, y) in roomBoundary]),
+               max([y for (x, y) in roomBoundary])))
+    (minX, maxX), (minY, maxY) = bounds
 
-    # Organize the boundary into a polygon data structure
-    boundary = path.Path(ROOM_BOUNDARY)
+    roomObstacles = []
+    for obs in range(numObstacles):
+        numSides = rng.choice(range(3, MAX_NUM_OBSTACLE_SIDES))
+        radius = rng.uniform(MIN_OBSTACLE_RADIUS, MAX_OBSTACLE_RADIUS)
+
+        # Keep resampling points until we find a reasonable one, giving up on
+        # this obstacle if the room is too small for it
+        for attempt in range(MAX_PLACEMENT_TRIES):
+            x, y = rng.uniform(minX, maxX), rng.uniform(minY, maxY)
+            if boundary.contains_point((x, y)) and \
+               boundary.contains_point((x + P * radius, y)) and \
+               boundary.contains_point((x + P * radius, y + P * radius)) and \
+               boundary.contains_point((x, y + P * radius)):
+                roomObstacles.append(getPolygon(x, y, numSides, radius))
+                break
+
+    # Pick start and goal locations that are free
+    obstacleIndex = ObstacleIndex(roomObstacles)
+    pairs = [(getRandomLocation(rng, boundary, obstacleIndex, bounds),
+              getRandomLocation(rng, boundary, obstacleIndex, bounds))
+             for pair in range(numPairs)]
+    return roomBoundary, roomObstacles, pairs
 
-    # Pick the penup and move it to the center before we draw the obstacles
-    turtle.penup()
-    turtle.pencolor('black')
-    turtle.pensize(2)
-    turtle.goto(0, 0)
+def randomEnvironmentGenerator():
+    '''
+    Draws a random environment.
+    '''
+    # Global variables
+    global ROOM_BOUNDARY, ROOM_OBSTACLES
+    global START_LOCATION, GOAL_LOCATION
 
-    # Minimum and maximum possible coordinates
-    minX = min([x for (x,y) in ROOM_BOUNDARY])
-    maxX = max([x for (x,y) in ROOM_BOUNDARY])
-    minY = min([y for (x,y) in ROOM_BOUNDARY])
-    maxY = max([y for (x,y) in ROOM_BOUNDARY])
+    ROOM_BOUNDARY, ROOM_OBSTACLES, pairs = generateRandomEnvironment()
+    START_LOCATION, GOAL_LOCATION = pairs[0]
+
+    # Draw the environment boundary on the window and fill it with white
+    turtle.pensize(4)
+    turtle.pencolor('blue')
+    drawPolygon(turtle, ROOM_BOUNDARY, 'white')
 
     # Draw all of the obstacles in the environment
-    for obs in range(numObstacles):
-        numSides = random.choice(range(3, MAX_NUM_OBSTACLE_SIDES))
-        radius = random.uniform(MIN_OBSTACLE_RADIUS, MAX_OBSTACLE_RADIUS)
-
-        # Keep resampling points until we find a reasonable one
-        x, y = random.uniform(minX, maxX), random.uniform(minY, maxY)
-        while not (boundary.contains_point((x, y)) and \
-                   boundary.contains_point((x + P * radius, y)) and \
-                   boundary.contains_point((x + P * radius, y + P * radius)) and \
-                   boundary.contains_point((x, y + P * radius))):
-            x, y = random.uniform(minX, maxX), random.uniform(minY, maxY)
-        
-        # We found a point that's sufficiently far away fromt he boundary of 
-        # the environment given this radius so draw the polygon
-        obstacle = drawPolygon(turtle, x, y, numSides, radius)
-        ROOM_OBSTACLES.append(obstacle)
-
-    # Prepare the turtle to pick the start and goal location
+    turtle.pencolor('black')
+    turtle.pensize(2)
+    for obstacle in ROOM_OBSTACLES:
+        drawPolygon(turtle, obstacle, 'black')
+
+    # Prepare the turtle to place the start and goal location
     turtle.penup()
     turtle.goto(0, 0)
     turtle.shapesize(1.0, 1.0)
     turtle.pensize(10)
 
-    # Pick the start location 
-    START_LOCATION = random.uniform(minX, maxX), random.uniform(minY, maxY)
-    while not boundary.contains_point(START_LOCATION):
-        START_LOCATION = random.uniform(minX, maxX), random.uniform(minY, maxY)
-
     # Place the start dot on the window
     turtle.goto(START_LOCATION[0], START_LOCATION[1])
     turtle.pencolor('green')
     turtle.fillcolor('green')
     turtle.dot()
 
-    # Pick the goal location
-    GOAL_LOCATION = random.uniform(minX, maxX), random.uniform(minY, maxY)
-    while not boundary.contains_point(GOAL_LOCATION):
-        GOAL_LOCATION = random.uniform(minX, maxX), random.uniform(minY, maxY)
-
-    # Place the start dot on the window
+    # Place the goal dot on the window
     turtle.goto(GOAL_LOCATION[0], GOAL_LOCATION[1])
     turtle.pencolor('red')
     turtle.fillcolor('red')
@@ -377,6 +393,10 @@ if __name__ == '__main__':
     customizeResponse = raw_input(q)
     customizeInput = customizeResponse == '' or customizeResponse == 'Y'
 
+    # Only the windows below need turtle, so modules that just import from
+    # this one never pay for loading a GUI toolkit
+    import turtle
+
     turtle.setup(WINDOW_SIZE, WINDOW_SIZE)  # Set window size
     turtle.bgcolor('gray')
     turtle.shape('circle')
@@ -404,24 +424,24 @@ if __name__ == '__main__':
     # boundary and to make sure that no obstacles overlap with any other 
     # obstacles
     for i, obs in enumerate(ROOM_OBSTACLES):
-        for p in obs: 
-            if not boundary.contains_point(p):
-                m = '[ERROR]: All obstacles are not contained within ' + \
-                    'environment boundary.'
-                print(m)
-                exit(1)
-
-        # Make sure start and goal location are not placed within an obstacle
-        obs = path.Path(obs)
-        if obs.contains_point(START_LOCATION):
-            m = '[ERROR]: Start location is contained within an obstacle.'
-            print(m)
-            exit(1)
-        if obs.contains_point(GOAL_LOCATION):
-            m = '[ERROR]: Goal location is contained within an obstacle.'
+        if not boundary.contains_points(obs).all():
+            m = '[ERROR]: All obstacles are not contained within ' + \
+                'environment boundary.'
             print(m)
             exit(1)
 
+    # Make sure start and goal location are not placed within an obstacle,
+    # only testing the obstacles around each of them
+    obstacleIndex = ObstacleIndex(ROOM_OBSTACLES)
+    if obstacleIndex.containsPoint(START_LOCATION):
+        m = '[ERROR]: Start location is contained within an obstacle.'
+        print(m)
+        exit(1)
+    if obstacleIndex.containsPoint(GOAL_LOCATION):
+        m = '[ERROR]: Goal location is contained within an obstacle.'
+        print(m)
+        exit(1)
+
     
     # Quick sanity check to make sure start location and end location were 
     # placed within environment boundary
@@ -0,0 +1,115 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import numpy as np
+from computeFieldPath import NEIGHBORS, Planner
+from runConfig import getConfig
+from constants import *
+
+def dilate(mask, steps):
+    '''
+    Returns the boolean grid mask grown by the given number of cells in each
+    of the 8 directions.
+    '''
+    rows, cols = mask.shape
+    for step in range(steps):
+        padded = np.pad(mask, 1)
+        grown = mask.copy()
+        for dRow, dCol in NEIGHBORS:
+            grown |= padded[1 + dRow:rows + 1 + dRow, 1 + dCol:cols + 1 + dCol]
+        mask = grown
+    return mask
+
+class HierarchicalPlanner(object):
+    '''
+    Plans over a coarse field of the whole room with cells factor times the
+    side of those of the RunConfig config, then computes the field at the
+    config's resolution only inside a corridor of margin coarse cells around
+    the coarse path from the start to the goal, where the path itself is
+    found. Every planner maps its grids from its own directory in the
+    config's storage, so planning in a corridor never touches the coarse
+    field.
+    '''
+
+    def __init__(self, boundary, obstacles, factor=HIERARCHY_FACTOR,
+                 margin=HIERARCHY_MARGIN, config=None):
+        self.roomBoundary = boundary
+        self.roomObstacles = obstacles
+        self.factor = factor
+        self.margin = margin
+        self.config = config = getConfig(config)
+        self.coarse = Planner(boundary, obstacles,
+                              resolution=config.resolution * factor,
+                              config=config)
+
+        # Field over the whole room, only built if a coarse path is missing
+        self.fine = None
+
+    def getCorridor(self, start, goal):
+        '''
+        Returns a boolean grid over the coarse field marking the cells within
+        margin of the coarse path from start to goal, or None if the coarse
+        field has no such path.
+        '''
+        pathXs, pathYs = self.coarse.planDescent(start, goal)
+        if not pathXs:
+            return None
+
+        corridor = np.zeros(self.coarse.shape, dtype=bool)
+        for p in [start] + list(zip(pathXs, pathYs)):
+            corridor[self.coarse.getIndexForPoint(p)] = True
+        return dilate(corridor, self.margin)
+
+    def refine(self, corridor):
+        '''
+        Returns a planner at full resolution over the bounding box of the
+        corridor whose field is only computed inside the corridor.
+        '''
+        rows, cols = np.nonzero(corridor)
+        top, bottom = rows.min(), rows.max() + 1
+        left, right = cols.min(), cols.max() + 1
+
+        # Every coarse cell covers factor by factor fine cells
+        f = self.factor
+        mask = corridor[top:bottom, left:right].repeat(f, 0).repeat(f, 1)
+        (x, y), size = self.coarse.origin, self.coarse.resolution
+        origin = (x + left * size, y + (self.coarse.shape[0] - bottom) * size)
+        fine = Planner(self.roomBoundary, self.roomObstacles, origin=origin,
+                       shape=mask.shape, mask=mask, config=self.config)
+
+        # Edges outside the corridor are not seen by the fine wavefront, so
+        # cap every fine level by the one its coarse cell implies
+        coarse = self.coarse.cells[top:bottom, left:right].astype(np.int64)
+        estimate = np.where(coarse > 0, (coarse - 1) * f + 1, 0)
+        estimate = estimate.repeat(f, 0).repeat(f, 1)
+        capped = (fine.marked != BOUNDARY_SPACE) & \
+                 (fine.marked != OBSTACLE_SPACE) & (estimate > 0) & \
+                 ((fine.cells == 0) | (fine.cells > estimate))
+        fine.cells[capped] = estimate[capped]
+        fine.marked[capped] = VISITED_SPACE
+        return fine
+
+    def plan(self, start, goal, mode=None):
+        '''
+        Returns the x and y coordinates of the path from the start location
+        to the goal location found at full resolution inside the corridor.
+        '''
+        corridor = self.getCorridor(start, goal)
+        if corridor is not None:
+            # The corridor is only planned in once, so its grids leave the
+            # storage as soon as the path is found
+            fine = self.refine(corridor)
+            try:
+                return fine.plan(start, goal, mode)
+            finally:
+                if fine.removeGrids is not None:
+                    fine.removeGrids()
+
+        # Passages narrower than a coarse cell can hide the only way through
+        print('[WARNING]: No coarse path from start location to goal ' +
+              'location, planning over the whole room.')
+        if self.fine is None:
+            self.fine = Planner(self.roomBoundary, self.roomObstacles,
+                                config=self.config)
+        return self.fine.plan(start, goal, mode)
@@ -0,0 +1,78 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import math
+import matplotlib.path as path
+from constants import *
+
+def getBox(polygon):
+    '''
+    Returns the (minX, minY, maxX, maxY) bounding box of the polygon, given
+    as a list of vertices.
+    '''
+    xs, ys = [x for (x, y) in polygon], [y for (x, y) in polygon]
+    return min(xs), min(ys), max(xs), max(ys)
+
+class ObstacleIndex(object):
+    '''
+    Uniform grid of square buckets OBSTACLE_BUCKET units a side over the
+    bounding boxes of a list of obstacles. Each bucket lists the obstacles
+    whose bounding boxes overlap it, so a point or region is only ever tested
+    against the obstacles near it however many there are in the room.
+    '''
+
+    def __init__(self, obstacles, size=OBSTACLE_BUCKET):
+        self.size = size
+        self.paths = []
+        self.boxes = []
+        self.buckets = {}
+        for obs in obstacles:
+            self.add(obs)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def getBuckets(self, box):
+        '''
+        Returns the (column, row) of every bucket overlapping the box.
+        '''
+        minX, minY, maxX, maxY = box
+        cols = range(int(math.floor(minX / self.size)),
+                     int(math.floor(maxX / self.size)) + 1)
+        rows = range(int(math.floor(minY / self.size)),
+                     int(math.floor(maxY / self.size)) + 1)
+        return [(col, row) for col in cols for row in rows]
+
+    def add(self, obstacle):
+        '''
+        Adds the obstacle, given as a list of vertices, to the index.
+        '''
+        i = len(self.paths)
+        box = getBox(obstacle)
+        self.paths.append(path.Path(obstacle))
+        self.boxes.append(box)
+        for bucket in self.getBuckets(box):
+            self.buckets.setdefault(bucket, []).append(i)
+
+    def query(self, box):
+        '''
+        Returns the positions in the list of obstacles, in increasing order,
+        of the obstacles whose bounding boxes overlap the (minX, minY, maxX,
+        maxY) box.
+        '''
+        minX, minY, maxX, maxY = box
+        found = set()
+        for bucket in self.getBuckets(box):
+            found.update(self.buckets.get(bucket, ()))
+        return sorted(i for i in found
+                      if self.boxes[i][0] <= maxX and minX <= self.boxes[i][2]
+                      and self.boxes[i][1] <= maxY and minY <= self.boxes[i][3])
+
+    def containsPoint(self, p):
+        '''
+        Returns whether the point p is inside any of the obstacles.
+        '''
+        x, y = p
+        return any(self.paths[i].contains_point(p)
+                   for i in self.query((x, y, x, y)))
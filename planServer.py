@@ -0,0 +1,367 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from batchPlan import attachArray, shareArray
+from computeFieldPath import Planner, getPlanner
+from fieldCache import getFieldKey
+from plannerProgress import ProgressReporter
+from runConfig import CONFIG_ALIASES, PLAN_SETTINGS, applySettings, \
+                      getConfig, parseConfig
+from constants import *
+
+# Planners over the shared fields each worker process has attached to, by
+# environment key and configuration, least recently used first
+WORKER_PLANNERS = OrderedDict()
+
+def startWorker():
+    '''
+    Worker initializer which keeps warnings from many workers from garbling
+    the server's console, and leaves interrupts to the server so it can shut
+    its workers down and free the shared fields.
+    '''
+    sys.stdout = open(os.devnull, 'w')
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def planInWorker(task):
+    '''
+    Plans the path for a (key, boundary, obstacles, cellsDesc, markedDesc,
+    start, goal, mode, config, maxEnvironments) task in a worker process and
+    returns it as a list of [x, y] points. The shared field of each
+    environment is only attached to the first time the worker plans in it
+    with a configuration, and at most maxEnvironments are kept attached.
+    '''
+    key, boundary, obstacles, cellsDesc, markedDesc, start, goal, mode, \
+        config, maxEnvironments = task
+    key = (key, config)
+    if key in WORKER_PLANNERS:
+        WORKER_PLANNERS.move_to_end(key)
+    else:
+        blocks = []
+        planner = Planner(boundary, obstacles,
+                          cells=attachArray(cellsDesc, blocks),
+                          marked=attachArray(markedDesc, blocks),
+                          progress=ProgressReporter(), config=config)
+        WORKER_PLANNERS[key] = (planner, blocks)
+
+        # Let go of the environments used least recently
+        while len(WORKER_PLANNERS) > maxEnvironments:
+            _, (planner, blocks) = WORKER_PLANNERS.popitem(last=False)
+            del planner
+            for block in blocks:
+                block.close()
+
+    planner, _ = WORKER_PLANNERS[key]
+    pathXs, pathYs = planner.plan(tuple(start), tuple(goal), mode)
+    return [[x, y] for (x, y) in zip(pathXs, pathYs)]
+
+def buildEnvironment(boundary, obstacles, config):
+    '''
+    Returns the field of the room with the RunConfig config, loaded from the
+    field cache or computed, copied into shared memory as the blocks of
+    shared memory along with the descriptions of the cells and marked grids
+    workers attach to them by.
+    '''
+    planner = getPlanner(boundary, obstacles, config=config)
+    cellsBlock, cellsDesc = shareArray(planner.cells)
+    markedBlock, markedDesc = shareArray(planner.marked)
+    return [cellsBlock, markedBlock], cellsDesc, markedDesc
+
+class PlanServer(object):
+    '''
+    Long running planning service which keeps the fields of up to
+    SERVER_ENVIRONMENTS rooms resident in shared memory. Rooms are registered
+    in the background on a thread, while paths are planned concurrently by a
+    pool of worker processes over the shared fields, so a plan in a known
+    room never pays for computing its field.
+
+    Clients send one JSON request per line and get one JSON response per
+    line, echoing the request's id if it has one. Requests are
+
+        {"op": "register", "boundary": [...], "obstacles": [...]}
+        {"op": "plan", "key": KEY, "start": [x, y], "goal": [x, y],
+         "mode": MODE}
+        {"op": "environments"}
+
+    where a plan gives either the key a registration returned or the
+    boundary and obstacles of the room itself. Registrations and plans may
+    also give a "config" object changing the path settings in PLAN_SETTINGS
+    from the server's configuration, so clients can plan with many
+    configurations over the same fields at once.
+    '''
+
+    def __init__(self, processes=SERVER_PROCESSES,
+                 maxEnvironments=SERVER_ENVIRONMENTS, config=None):
+        self.maxEnvironments = maxEnvironments
+        self.config = getConfig(config)
+        # Workers come from a fork server, as forking this process while the
+        # builder thread holds a lock would leave the lock held in the worker
+        self.pool = ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('forkserver'),
+            initializer=startWorker)
+        self.builder = ThreadPoolExecutor(1)
+
+        # Environments by key, least recently used first, each a dictionary
+        # holding the room, the future of its shared field and the number of
+        # plans using it
+        self.environments = OrderedDict()
+
+        # Environments no longer resident whose fields are kept until the
+        # plans still using them finish
+        self.retiring = []
+
+    def getRequestConfig(self, request):
+        '''
+        Returns the configuration of the request, the server's with the
+        settings in the request's config changed. Requests may only change
+        how paths are planned, never the fields the server computes.
+        '''
+        settings = request.get('config', {})
+        if not isinstance(settings, dict):
+            raise ValueError('Settings must be an object of names and values')
+        refused = sorted(set(CONFIG_ALIASES.get(name, name)
+                             for name in settings) - set(PLAN_SETTINGS))
+        if refused:
+            raise ValueError('Requests cannot change the settings ' +
+                             ', '.join(refused))
+        return applySettings(settings, self.config)
+
+    def register(self, boundary, obstacles, config=None):
+        '''
+        Starts building the field of the room with the RunConfig config, the
+        server's by default, in the background unless it is already
+        resident, and returns the key it is known by.
+        '''
+        config = self.config if config is None else config
+        key = getFieldKey(boundary, obstacles, config)
+        if key in self.environments:
+            self.environments.move_to_end(key)
+            return key
+
+        # The build itself is kept so the field can still be freed once the
+        # event loop has stopped
+        build = self.builder.submit(buildEnvironment, boundary, obstacles,
+                                    config)
+        self.environments[key] = {'boundary': boundary,
+                                  'obstacles': obstacles, 'build': build,
+                                  'field': asyncio.wrap_future(build),
+                                  'settings': config.getFieldSettings(),
+                                  'planning': 0}
+        while len(self.environments) > self.maxEnvironments:
+            _, environment = self.environments.popitem(last=False)
+            self.retire(environment)
+        return key
+
+    def retire(self, environment):
+        '''
+        Frees the field of an environment that is no longer resident, at once
+        if no plan is using it and otherwise once the last of them finishes.
+        '''
+        if environment['planning'] > 0:
+            self.retiring.append(environment)
+        else:
+            releaseEnvironment(environment)
+
+    async def plan(self, key, start, goal, mode=None, config=None):
+        '''
+        Returns the path from start to goal in the environment with the
+        given key as a list of [x, y] points, planned with the RunConfig
+        config, the server's by default, and waiting for its field if it is
+        still being built. The configuration must compute the same field as
+        the one the environment was registered with.
+        '''
+        config = self.config if config is None else config
+        if mode is None:
+            mode = config.mode
+        if key not in self.environments:
+            raise KeyError('Unknown environment ' + str(key))
+        environment = self.environments[key]
+        if config.getFieldSettings() != environment['settings']:
+            raise ValueError('Configuration computes a different field ' +
+                             'than environment ' + str(key))
+        self.environments.move_to_end(key)
+
+        # Hold on to the field until the worker is done with it, even if the
+        # environment is pushed out meanwhile
+        environment['planning'] += 1
+        try:
+            try:
+                _, cellsDesc, markedDesc = await environment['field']
+            except Exception:
+                # Let the room be registered again rather than keep the failure
+                if self.environments.get(key) is environment:
+                    del self.environments[key]
+                raise
+
+            task = (key, environment['boundary'], environment['obstacles'],
+                    cellsDesc, markedDesc, start, goal, mode, config,
+                    self.maxEnvironments)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, planInWorker, task)
+        finally:
+            environment['planning'] -= 1
+            if environment['planning'] == 0 and \
+               environment in self.retiring:
+                self.retiring.remove(environment)
+                releaseEnvironment(environment)
+
+    async def respond(self, request):
+        '''
+        Returns the response to a single request.
+        '''
+        op = request.get('op')
+        config = self.getRequestConfig(request)
+        if op == 'register':
+            key = self.register(request['boundary'], request['obstacles'],
+                                config)
+            return {'key': key,
+                    'ready': self.environments[key]['field'].done()}
+        if op == 'plan':
+            key = request.get('key')
+            if key is None:
+                key = self.register(request['boundary'], request['obstacles'],
+                                    config)
+            path = await self.plan(key, request['start'], request['goal'],
+                                   request.get('mode'), config)
+            return {'key': key, 'path': path}
+        if op == 'environments':
+            return {'environments': [{'key': key,
+                                      'ready': environment['field'].done()}
+                                     for (key, environment)
+                                     in self.environments.items()]}
+        raise ValueError('Unknown op ' + str(op))
+
+    async def handleRequest(self, line, writer, lock):
+        '''
+        Answers the request on a single line, writing the response once the
+        connection is free.
+        '''
+        request = {}
+        try:
+            request = json.loads(line)
+            response = await self.respond(request)
+            response['ok'] = True
+        except Exception as e:
+            response = {'ok': False, 'error': type(e).__name__ + ': ' + str(e)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+
+        async with lock:
+            writer.write((json.dumps(response) + '\n').encode('utf-8'))
+            await writer.drain()
+
+    async def handleConnection(self, reader, writer):
+        '''
+        Answers every request a client sends, each as soon as it is ready, so
+        one slow plan never holds up the others.
+        '''
+        lock, pending = asyncio.Lock(), set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self.handleRequest(line, writer,
+                                                                lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            writer.close()
+
+    async def serve(self, address=SERVER_ADDRESS):
+        '''
+        Serves clients on the Unix socket at address, or on the TCP port if
+        address is HOST:PORT, until cancelled.
+        '''
+        if ':' in address:
+            host, port = address.rsplit(':', 1)
+            server = await asyncio.start_server(self.handleConnection, host,
+                                                int(port))
+        else:
+            if os.path.exists(address):
+                os.remove(address)
+            server = await asyncio.start_unix_server(self.handleConnection,
+                                                     address)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        '''
+        Stops the worker processes, waits for the fields still being built
+        and frees the shared memory of every field.
+        '''
+        self.pool.shutdown()
+        self.builder.shutdown()
+        for environment in list(self.environments.values()) + self.retiring:
+            releaseEnvironment(environment)
+        self.environments.clear()
+        self.retiring = []
+
+def releaseEnvironment(environment):
+    '''
+    Frees the shared memory of the environment's field once it is built,
+    doing nothing if it was already freed.
+    '''
+    build = environment.pop('build', None)
+    if build is not None:
+        build.add_done_callback(releaseField)
+
+def releaseField(field):
+    '''
+    Frees the shared memory of the field built by the finished future.
+    '''
+    if field.cancelled() or field.exception() is not None:
+        return
+    blocks, _, _ = field.result()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+def sendRequest(address, request):
+    '''
+    Sends a single request to the server at address and returns its
+    response.
+    '''
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)))
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+    with sock, sock.makefile('rwb') as f:
+        f.write((json.dumps(request) + '\n').encode('utf-8'))
+        f.flush()
+        return json.loads(f.readline())
+
+if __name__ == '__main__':
+
+    # Settings of the server come from --config FILE and --NAME=VALUE flags
+    CONFIG, ARGS = parseConfig(sys.argv[1:])
+    address = ARGS[0] if ARGS else SERVER_ADDRESS
+
+    startTime = time.time() # Start the timer
+
+    SERVER = PlanServer(config=CONFIG)
+    print('\nServing plans on ' + address + '...')
+    try:
+        asyncio.run(SERVER.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        SERVER.close()
+
+    elapsedTime = str(round(time.time() - startTime, 3))
+    print('\n\n' + '-' * 65 + '\n')
+    print('\n[SUCCESS]: ' + elapsedTime + ' seconds...\n')
@@ -0,0 +1,64 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import time
+from contextlib import contextmanager
+
+class PlannerMetrics(object):
+    '''
+    Durations of the phases of a planning run along with counters of what
+    they did, such as the number of reachable cells or path steps, exported
+    as a single JSON record. Phases run more than once add up their
+    durations. Every hook is called with the name and duration of each phase
+    as it ends.
+    '''
+
+    def __init__(self, hooks=()):
+        self.phases = {}
+        self.counters = {}
+        self.hooks = list(hooks)
+
+    @contextmanager
+    def phase(self, name):
+        '''
+        Times the body of the with statement as the named phase.
+        '''
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - startTime
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            for hook in self.hooks:
+                hook(name, seconds)
+
+    def set(self, **counters):
+        '''
+        Sets each of the given counters to its value.
+        '''
+        self.counters.update(counters)
+
+    def peak(self, name, value):
+        '''
+        Raises the named counter to value if it is not already higher.
+        '''
+        self.counters[name] = max(value, self.counters.get(name, value))
+
+    def getRecord(self):
+        '''
+        Returns the phases and counters as a dictionary ready to be saved as
+        JSON, stamped with the time it was made.
+        '''
+        record = {'time': time.time(), 'phases': dict(self.phases)}
+        record.update(self.counters)
+        return record
+
+    def save(self, filename):
+        '''
+        Appends the record of the run to filename as a line of JSON, so one
+        file can track the planner over many runs.
+        '''
+        with open(filename, 'a') as wr:
+            wr.write(json.dumps(self.getRecord()) + '\n')
@@ -0,0 +1,97 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import sys
+import time
+from collections import namedtuple
+from constants import *
+
+# What a progress callback is told: the stage running, how many of its cells
+# or steps are done out of total (None when unknown), a dictionary of other
+# numbers worth showing and whether the stage just finished
+ProgressEvent = namedtuple('ProgressEvent',
+                           ['stage', 'done', 'total', 'details', 'finished'])
+
+# Console messages for each stage
+PROGRESS_MESSAGES = {
+    'propagate': 'Marking reachable points with their potential.',
+    'bands': 'Marking reachable points with their potential.',
+    'transform': 'Marking reachable points with their potential.',
+    'plan': 'Computing path from start to goal.'
+}
+
+def printProgress(event):
+    '''
+    Progress callback which rewrites the current console line with the
+    progress of the stage, moving to a new line once it finishes.
+    '''
+    message = PROGRESS_MESSAGES.get(event.stage, event.stage)
+    if event.total:
+        pro = str(round(100.0 * event.done / event.total, 1)) + '%'
+    else:
+        pro = str(event.done)
+    details = ', '.join(k + ' ' + str(v)
+                        for (k, v) in sorted(event.details.items()))
+    if details:
+        pro += ' (' + details + ')'
+    sys.stdout.write(message + ' ' + pro + '...    ' +
+                     ('\n' if event.finished else '\r'))
+    sys.stdout.flush()
+
+class ProgressReporter(object):
+    '''
+    Passes the progress of long running stages to a callback at most once
+    every `every` cells or steps and at most once every `interval` seconds,
+    plus once when each stage finishes. A loop only compares its count with
+    the one update() last returned, so without a callback it does no
+    formatting or I/O at all.
+    '''
+
+    def __init__(self, callback=None, every=PROGRESS_EVERY,
+                 interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.every = every
+        self.interval = interval
+        self.stage, self.total = None, None
+        self.lastReport = 0.0
+
+    def start(self, stage, total=None):
+        '''
+        Starts reporting on the named stage of total cells or steps. Returns
+        the count at which update() should first be called.
+        '''
+        self.stage, self.total = stage, total
+        self.lastReport = time.perf_counter()
+        return self.every if self.callback is not None else float('inf')
+
+    def update(self, done, **details):
+        '''
+        Reports that done cells or steps of the stage are finished if the
+        last report was long enough ago. Returns the count at which update()
+        should next be called.
+        '''
+        if self.callback is None:
+            return float('inf')
+        now = time.perf_counter()
+        if now - self.lastReport >= self.interval:
+            self.lastReport = now
+            self.callback(ProgressEvent(self.stage, done, self.total, details,
+                                        False))
+        return done + self.every
+
+    def finish(self, done, **details):
+        '''
+        Reports that the stage finished after done cells or steps.
+        '''
+        if self.callback is not None:
+            self.callback(ProgressEvent(self.stage, done, self.total, details,
+                                        True))
+
+def getProgressReporter():
+    '''
+    Returns a reporter printing progress to the console if it is attached to
+    a terminal, and one reporting nothing otherwise.
+    '''
+    isTerminal = hasattr(sys.stdout, 'isatty') and sys.stdout.isatty()
+    return ProgressReporter(printProgress if isTerminal else None)
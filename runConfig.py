@@ -0,0 +1,190 @@
+# Ricky Galliani
+# Wave Front Potential Path Finder
+# March 2017
+
+import json
+import math
+from collections import namedtuple
+from constants import *
+
+# Settings a run can change, with the constants giving their defaults
+CONFIG_DEFAULTS = [
+    ('resolution', D),                        # Side of a cell
+    ('windowSize', WINDOW_SIZE),              # Window grids line up with
+    ('gridMargin', GRID_MARGIN),              # Cells kept around the room
+    ('engine', FIELD_ENGINE),                 # Engine propagating potential
+    ('storage', GRID_STORAGE),                # Directory to map grids in
+    ('bandRows', BAND_ROWS),                  # Rows processed at a time
+    ('mode', PATH_MODE),                      # How paths follow potential
+    ('maxSteps', MAX_NUM_STEPS),              # Steps before giving up
+    ('closeThreshold', CLOSE_PATH_THRESHOLD), # Distance to goal that is close
+    ('distanceWeight', K),
+    ('potentialWeight', G),
+    ('originalityWeight', O),
+    ('originalityBucket', ORIGINALITY_BUCKET),
+    ('headless', HEADLESS),
+    ('plotOutput', PLOT_OUTPUT),
+    ('pathOutput', PATH_OUTPUT),
+    ('fieldOutput', FIELD_OUTPUT),
+    ('frameOutput', FRAME_OUTPUT),
+    ('metricsOutput', METRICS_OUTPUT),
+    ('profileOutput', PROFILE_OUTPUT)
+]
+
+# Settings the field of a room depends on, so fields computed with the same
+# values of them can be shared between configurations
+FIELD_SETTINGS = ['resolution', 'windowSize', 'gridMargin', 'engine']
+
+# Short names the configurable constants are known by on the command line
+CONFIG_ALIASES = {'D': 'resolution', 'K': 'distanceWeight',
+                  'G': 'potentialWeight', 'O': 'originalityWeight'}
+
+# Settings that only change how paths follow a field, so a field computed
+# once can be planned over with any values of them
+PLAN_SETTINGS = ['mode', 'maxSteps', 'closeThreshold', 'distanceWeight',
+                 'potentialWeight', 'originalityWeight', 'originalityBucket']
+
+# Values the settings that name one of a few choices can take
+CONFIG_CHOICES = {'engine': (BFS_ENGINE, CHAMFER_ENGINE, OCTILE_ENGINE),
+                  'mode': (SCORE_MODE, DESCENT_MODE)}
+
+# Numeric settings that must be above zero, and those that must not be below
+POSITIVE_SETTINGS = ['resolution', 'windowSize', 'bandRows',
+                     'originalityBucket']
+NON_NEGATIVE_SETTINGS = ['gridMargin', 'maxSteps', 'closeThreshold']
+
+def checkSetting(name, value):
+    '''
+    Returns the value of the named setting as the type of its default,
+    raising a ValueError if it is not a single finite value of that type in
+    the range of the setting. Settings without a default, like storage, take
+    a string or None.
+    '''
+    default = dict(CONFIG_DEFAULTS)[name]
+    isNumber = isinstance(value, (int, float)) and \
+               not isinstance(value, bool)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError('Setting ' + name + ' must be true or false')
+    elif isinstance(default, int):
+        if not isNumber or value != int(value):
+            raise ValueError('Setting ' + name + ' must be a whole number')
+        value = int(value)
+    elif isinstance(default, float):
+        if not isNumber or not math.isfinite(value):
+            raise ValueError('Setting ' + name + ' must be a number')
+        value = float(value)
+    elif not isinstance(value, str) and \
+         not (default is None and value is None):
+        raise ValueError('Setting ' + name + ' must be a string')
+
+    if name in CONFIG_CHOICES and value not in CONFIG_CHOICES[name]:
+        raise ValueError('Setting ' + name + ' must be one of ' +
+                         ', '.join(CONFIG_CHOICES[name]))
+    if name in POSITIVE_SETTINGS and value <= 0:
+        raise ValueError('Setting ' + name + ' must be above zero')
+    if name in NON_NEGATIVE_SETTINGS and value < 0:
+        raise ValueError('Setting ' + name + ' must not be below zero')
+    return value
+
+class RunConfig(namedtuple('RunConfig', [n for (n, _) in CONFIG_DEFAULTS])):
+    '''
+    Settings of a single run, passed explicitly to everything that computes
+    fields and plans paths so runs with different settings can share one
+    process. Configurations are immutable and hashable, so they can key
+    caches, and replace() returns a copy with some settings changed.
+    '''
+    __slots__ = ()
+
+    def replace(self, **changes):
+        '''
+        Returns a copy of the configuration with the given settings changed,
+        rejecting names that are not settings and values that are not of
+        the type of the setting, so configurations stay hashable.
+        '''
+        unknown = sorted(set(changes) - set(self._fields))
+        if unknown:
+            raise ValueError('Unknown settings ' + ', '.join(unknown))
+        return self._replace(**dict((name, checkSetting(name, value))
+                                    for (name, value) in changes.items()))
+
+    def getFieldSettings(self):
+        '''
+        Returns the values of the settings the field of a room depends on.
+        '''
+        return tuple(getattr(self, name) for name in FIELD_SETTINGS)
+
+    def toDict(self):
+        '''
+        Returns the settings as a dictionary, as loadConfig() reads them.
+        '''
+        return dict(self._asdict())
+
+DEFAULT_CONFIG = RunConfig(*[value for (_, value) in CONFIG_DEFAULTS])
+
+def getConfig(config=None):
+    '''
+    Returns the configuration, or the default one if it is None.
+    '''
+    return DEFAULT_CONFIG if config is None else config
+
+def applySettings(settings, config=DEFAULT_CONFIG):
+    '''
+    Returns the configuration with the settings in the dictionary, by name or
+    short name, changed. Every setting must be a single value.
+    '''
+    if not isinstance(settings, dict):
+        raise ValueError('Settings must be an object of names and values')
+    for (name, value) in settings.items():
+        if isinstance(value, (list, dict)):
+            raise ValueError('Setting ' + name + ' must be a single value')
+    return config.replace(**dict((CONFIG_ALIASES.get(k, k), v)
+                                 for (k, v) in settings.items()))
+
+def loadConfig(filename, config=DEFAULT_CONFIG):
+    '''
+    Returns the configuration with the settings in the JSON object in the
+    file changed.
+    '''
+    with open(filename, 'r') as f:
+        return applySettings(json.load(f), config)
+
+def parseSetting(name, value):
+    '''
+    Returns the value of the setting given on the command line. Settings
+    holding strings take it as it is, apart from null for those that may be
+    None, while every other value is read as JSON.
+    '''
+    default = dict(CONFIG_DEFAULTS)[name]
+    if isinstance(default, str) or (default is None and value != 'null'):
+        return value
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return value
+    if isinstance(parsed, (list, dict)):
+        raise ValueError('Setting ' + name + ' must be a single value')
+    return parsed
+
+def parseConfig(args, config=DEFAULT_CONFIG):
+    '''
+    Returns the configuration given by the command line arguments, along
+    with the arguments that are not about it. `--config FILE` loads the
+    settings in the file and `--NAME=VALUE` changes a single setting, applied
+    in the order they are given.
+    '''
+    rest, i = [], 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--config' and i + 1 < len(args):
+            config = loadConfig(args[i + 1], config)
+            i += 2
+            continue
+        name, eq, value = arg[2:].partition('=')
+        name = CONFIG_ALIASES.get(name, name)
+        if arg.startswith('--') and eq and name in config._fields:
+            config = config.replace(**{name: parseSetting(name, value)})
+        else:
+            rest.append(arg)
+        i += 1
+    return config, rest